@@ -0,0 +1,43 @@
+"""batch_irr：所有组合同时做牛顿迭代，每个组合的解满足 NPV = 0，无解的组合为 NaN"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 收益引擎 import batch_irr  # noqa: E402
+
+
+def npv(rate, cashflows, years):
+    return np.sum(np.asarray(cashflows) / (1 + rate) ** np.asarray(years))
+
+
+def test_known_rates_solved_together():
+    cashflows = np.array([
+        [-100.0, 110.0, 0.0],       # 一年 10%
+        [-100.0, 0.0, 121.0],       # 两年 10%
+        [-100.0, -50.0, 140.0],     # 年中追加投入后亏损
+        [-100.0, 30.0, 80.0],
+    ])
+    years = np.array([[0, 1, 1], [0, 1, 2], [0, 0.5, 1], [0, 0.25, 1]])
+    rates = batch_irr(cashflows, years)
+
+    np.testing.assert_allclose(rates[:2], [0.10, 0.10])
+    assert rates[2] < 0 < rates[3]
+    for r, cf, t in zip(rates, cashflows, years):
+        assert abs(npv(r, cf, t)) < 1e-8
+
+
+def test_unsolvable_rows_are_nan():
+    cashflows = np.array([[-100.0, -10.0], [100.0, 10.0], [0.0, 0.0], [-100.0, 105.0]])
+    years = np.array([[0, 1]] * 4, dtype=float)
+    rates = batch_irr(cashflows, years)
+    assert np.isnan(rates[:3]).all()  # 现金流同号或全为 0，无解
+    np.testing.assert_allclose(rates[3], 0.05)
+
+
+def test_missing_periods_count_as_zero():
+    # 期数不同的组合用 NaN 补齐，补齐的期不影响结果
+    rates = batch_irr([[-100.0, 110.0, np.nan]], [[0, 1, np.nan]])
+    np.testing.assert_allclose(rates, [0.10])
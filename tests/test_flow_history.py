@@ -0,0 +1,40 @@
+"""资金历史：用报表历史补齐后再按表格3入库，每个组合每天只有一行"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 数据存储 import load_flow_history, save_flow_history, save_report_history, seed_flow_history  # noqa: E402
+
+NAMES = ["股债平衡", "债券稳健", "货币增强"]
+
+
+def test_seed_then_save_one_row_per_portfolio(tmp_path):
+    db = str(tmp_path / "基金数据.db")
+    # 报表历史（表格4）中的组合名称带“组合”后缀
+    save_report_history(pd.DataFrame({
+        "组合名称": [f"{n}组合" for n in NAMES for _ in range(2)],
+        "日期": ["2025-08-14", "2025-08-15"] * len(NAMES),
+        "签约客户数": 1, "解约客户数": 0, "新增金额（万元）": 1.5, "减少金额（万元）": 0.5,
+    }), db)
+    assert seed_flow_history(db) == 2 * len(NAMES)
+
+    # 表格3中的组合名称不带后缀，另有“客户去重”标记行（一键生成报表.py 入库前去掉）
+    df_flow = pd.DataFrame({
+        "组合名称": NAMES + ["客户去重"],
+        "签约客户数(户)": [2, 3, 4, 9], "转入资金(元)": 100.0,
+        "解约客户数(户)": 1, "转出资金(元)": 50.0,
+    })
+    save_flow_history(df_flow[df_flow["组合名称"].isin(NAMES)], "2025-08-15", db)
+    save_flow_history(df_flow.iloc[:1].assign(组合名称="股债平衡组合"), "2025-08-16", db)
+
+    df = load_flow_history(db)
+    assert sorted(df["组合名称"].astype(str).unique()) == sorted(NAMES)
+    assert not df.duplicated(["组合名称", "日期"]).any()
+    day = df[df["日期"] == "2025-08-15"].set_index("组合名称")
+    assert len(day) == len(NAMES)
+    # 当天按表格3写入的数值覆盖补齐的数值
+    assert day.loc["债券稳健", "签约客户数(户)"] == 3
+    assert day.loc["债券稳健", "转入资金(元)"] == 100.0
@@ -0,0 +1,44 @@
+"""find_marker_row：标记行（客户小计、客户去重）按列顺序查找，返回最早出现的行"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 表格工具 import find_marker_row  # noqa: E402
+
+
+def export():
+    """银行导出的样子：标记行不一定在组合名称列，数值列中混有文本，行索引不从 0 开始"""
+    return pd.DataFrame({
+        "机构名称": ["总行", "分行", "客户小计", None, "合计"],
+        "组合名称": ["股债平衡", "债券稳健", None, "客户去重", "客户去重(含销户)"],
+        "客户数": [10, 20, 30, 25, 40],
+        "备注": [None, "客户小计见下行", 1.5, None, None],
+    }, index=range(100, 105))
+
+
+def test_returns_earliest_row_across_columns():
+    df = export()
+    # 备注列排在最后查找，但它在更早的行命中，结果取最早的行
+    assert find_marker_row(df, "客户小计") == 101
+    # 只在指定列中查找
+    assert find_marker_row(df, "客户小计", columns=["机构名称"]) == 102
+
+
+def test_exact_match_ignores_longer_labels():
+    df = export()
+    assert find_marker_row(df, "客户去重", columns=["组合名称"], exact=True) == 103
+    df.loc[103, "组合名称"] = "  客户去重 "
+    assert find_marker_row(df, "客户去重", columns=["组合名称"], exact=True) == 103
+    df.loc[103, "组合名称"] = None
+    assert find_marker_row(df, "客户去重", columns=["组合名称"], exact=True) is None
+    assert find_marker_row(df, "客户去重", columns=["组合名称"]) == 104
+
+
+def test_numeric_columns_and_missing_marker():
+    df = export()
+    assert find_marker_row(df, "30") is None  # 数值列不按文本比较
+    assert find_marker_row(df, "不存在") is None
+    assert find_marker_row(df.iloc[:0], "客户小计") is None
@@ -0,0 +1,56 @@
+"""净值历史：按组合代码的水位线只写入新日期；since 重灌时按 (组合代码, 净值日期) 覆盖，不产生重复行"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 数据存储 import ingest_nav, load_nav_history  # noqa: E402
+
+
+def nav_rows(dates, nav=1.0):
+    """两个组合在 dates 各日的净值导出；组合代码写成数字，入库时补足4位"""
+    return pd.DataFrame({
+        "组合代码": [1, 2] * len(dates),
+        "组合名称": ["股债平衡", "债券稳健"] * len(dates),
+        "策略名称": "稳健配置",
+        "净值日期": [d for d in dates for _ in range(2)],
+        "组合净值": nav,
+        "基准净值": 1.0,
+    })
+
+
+def test_watermark_skips_ingested_dates(tmp_path):
+    db = str(tmp_path / "基金数据.db")
+    assert ingest_nav(nav_rows(["2025-08-14", "2025-08-15"]), db) == 4
+    # 同一份导出再入库一次：全部在水位线之内
+    assert ingest_nav(nav_rows(["2025-08-14", "2025-08-15"]), db) == 0
+
+    # 次日导出带着完整历史（已入库的日期净值有变化也不覆盖），只写入 08-18 两行
+    assert ingest_nav(nav_rows(["2025-08-14", "2025-08-15", "2025-08-18"], nav=1.5), db) == 2
+    df = load_nav_history(db)
+    assert len(df) == 6
+    assert sorted(df["组合代码"].astype(str).unique()) == ["0001", "0002"]
+    assert df.loc[df["净值日期"] == "2025-08-15", "组合净值"].tolist() == [1.0, 1.0]
+    assert df.loc[df["净值日期"] == "2025-08-18", "组合净值"].tolist() == [1.5, 1.5]
+
+
+def test_since_rewrites_corrected_rows(tmp_path):
+    db = str(tmp_path / "基金数据.db")
+    ingest_nav(nav_rows(["2025-08-14", "2025-08-15"]), db)
+    assert ingest_nav(nav_rows(["2025-08-14", "2025-08-15"], nav=1.2), db, since="2025-08-15") == 2
+
+    df = load_nav_history(db)
+    assert len(df) == 4
+    assert not df.duplicated(["组合代码", "净值日期"]).any()
+    assert df.loc[df["净值日期"] == "2025-08-14", "组合净值"].tolist() == [1.0, 1.0]
+    assert df.loc[df["净值日期"] == "2025-08-15", "组合净值"].tolist() == [1.2, 1.2]
+
+
+def test_watermark_is_per_portfolio(tmp_path):
+    db = str(tmp_path / "基金数据.db")
+    ingest_nav(nav_rows(["2025-08-15"]).iloc[:1], db)  # 只有 0001 入库
+    # 0002 尚无水位线，08-15 仍写入；0001 的 08-15 已在水位线之内
+    assert ingest_nav(nav_rows(["2025-08-15"]), db) == 1
+    assert len(load_nav_history(db, codes=[2])) == 1
@@ -0,0 +1,33 @@
+"""parse_numeric：千分位、全角符号、百分数文本和计数列的 int32 压缩"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 数值清洗 import parse_number, parse_numeric  # noqa: E402
+
+
+def test_thousands_full_width_and_percent_text():
+    s = pd.Series(["1,234.56", "1，234", "−5", "－1,000", " 12 ", "12.5%", "3.5％", "-0.8 %"])
+    out = parse_numeric(s)
+    assert out.dtype == np.float64
+    np.testing.assert_allclose(out, [1234.56, 1234, -5, -1000, 12, 0.125, 0.035, -0.008])
+
+
+def test_mixed_cells_keep_numbers_and_blank_bad_text():
+    s = pd.Series([1500, "2,500", None, "暂无", 3.25], dtype=object)
+    out = parse_numeric(s)
+    np.testing.assert_allclose(out, [1500, 2500, np.nan, np.nan, 3.25])
+    assert parse_number("−1,234.5") == -1234.5
+    assert parse_number("5%") == 0.05
+
+
+def test_integer_downcast_only_when_lossless():
+    assert parse_numeric(pd.Series(["1,200", "35"]), downcast="integer").dtype == np.int32
+    # 有缺失、有小数或超出 int32 范围时保持 float64
+    assert parse_numeric(pd.Series(["1,200", None]), downcast="integer").dtype == np.float64
+    assert parse_numeric(pd.Series(["1.5", "2"]), downcast="integer").dtype == np.float64
+    assert parse_numeric(pd.Series([2 ** 40, 1]), downcast="integer").dtype == np.int64
@@ -0,0 +1,52 @@
+"""compute_risk_metrics：矩阵上一次算出的指标与逐个组合按定义计算的结果一致"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 风险指标 import PERIODS_PER_YEAR, compute_risk_metrics  # noqa: E402
+
+
+def nav_history():
+    dates = pd.bdate_range("2025-01-02", periods=6)
+    return pd.DataFrame({
+        "组合名称": ["股债平衡"] * 6 + ["债券稳健"] * 3 + ["货币增强"],
+        "净值日期": list(dates) + list(dates[3:]) + [dates[-1]],
+        "组合净值": [1.0, 1.2, 0.9, 1.1, 1.0, 1.32, 2.0, 2.1, 2.0, 1.0],
+        "基准净值": [1.0, 1.1, 1.0, 1.05, 1.0, 1.1, 1.0, 1.0, 1.01, 1.0],
+    })
+
+
+def test_metrics_match_per_portfolio_definitions():
+    df = nav_history()
+    result = compute_risk_metrics(df, risk_free=0.01).set_index("组合名称")
+
+    for name, g in df.groupby("组合名称"):
+        if len(g) < 2:
+            continue
+        nav, bench = g["组合净值"].to_numpy(), g["基准净值"].to_numpy()
+        r = nav[1:] / nav[:-1] - 1
+        active = r - (bench[1:] / bench[:-1] - 1)
+        days = (g["净值日期"].iloc[-1] - g["净值日期"].iloc[0]).days
+        vol = r.std(ddof=1) * np.sqrt(PERIODS_PER_YEAR)
+        row = result.loc[name]
+        np.testing.assert_allclose(row["年化收益"], (nav[-1] / nav[0]) ** (365 / days) - 1)
+        np.testing.assert_allclose(row["年化波动率"], vol)
+        np.testing.assert_allclose(row["最大回撤"], (nav / np.maximum.accumulate(nav) - 1).min())
+        np.testing.assert_allclose(row["夏普比率"], (r.mean() * PERIODS_PER_YEAR - 0.01) / vol)
+        np.testing.assert_allclose(row["跟踪误差"], active.std(ddof=1) * np.sqrt(PERIODS_PER_YEAR))
+        assert row["起始净值日期"] == g["净值日期"].iloc[0]
+
+    np.testing.assert_allclose(result.loc["股债平衡", "最大回撤"], -0.25)  # 1.2 → 0.9
+
+
+def test_short_histories_give_blank_metrics():
+    result = compute_risk_metrics(nav_history()).set_index("组合名称")
+    # 只有一条净值：各指标为空，不是 inf
+    assert result.loc["货币增强", ["年化收益", "年化波动率", "夏普比率"]].isna().all()
+    # 历史不足 1 个月：近1月收益为空；今年以来收益相对首个净值日之前的上年末，同样为空
+    assert result[["近1月收益", "今年以来收益"]].isna().all().all()
+    assert not np.isinf(result.select_dtypes("number").to_numpy()).any()
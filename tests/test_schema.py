@@ -0,0 +1,50 @@
+"""表格结构：列名的其他写法、前缀 / 包含规则、金额单位校验和类型转换"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from 表格结构 import SchemaError, apply_schema, resolve_columns  # noqa: E402
+
+
+def test_aliases_and_full_width_headers():
+    mapping = dict(resolve_columns("资金", ("组合名称", "签约客户数", "转入资金（元）", "解约客户数(户)", " 转出资金 ")))
+    assert mapping == {
+        "组合名称": "组合名称", "签约客户数(户)": "签约客户数", "转入资金(元)": "转入资金（元）",
+        "解约客户数(户)": "解约客户数(户)", "转出资金(元)": " 转出资金 ",
+    }
+
+
+def test_contains_rule_and_unit_check():
+    assert dict(resolve_columns("资产", ("组合名称", "客户数(户)", "期末总资产（元）")))["总资产(元)"] == "期末总资产（元）"
+    assert dict(resolve_columns("资产", ("组合名称", "客户数", "总资产")))["总资产(元)"] == "总资产"
+    # 单位为万元的总资产不能当作元读取（否则差 1 万倍）
+    for header in ("总资产(万元)", "总资产（万元）", "期末总资产 (亿元)"):
+        with pytest.raises(SchemaError, match="单位是"):
+            resolve_columns("资产", ("组合名称", "客户数", header))
+    # 同时有以元为单位的列时用它，万元列不影响
+    assert dict(resolve_columns("资产", ("组合名称", "客户数", "总资产(万元)", "总资产")))["总资产(元)"] == "总资产"
+    # 绘图数据中的总资产本来就是万元
+    assert dict(resolve_columns("绘图", ("日期", "组合累计收益(%)", "基准累计收益", "超额收益",
+                                       "总资产（万元）", "总份额（万份）")))["总资产"] == "总资产（万元）"
+
+
+def test_missing_columns_are_listed():
+    with pytest.raises(SchemaError, match="缺少列：客户数、总资产"):
+        resolve_columns("资产", ("组合名称", "机构"))
+
+
+def test_apply_schema_renames_and_converts():
+    df = apply_schema(pd.DataFrame({
+        "组合代码": [1, "0002"], "组合名称": ["股债平衡", "债券稳健"], "策略名称": "稳健配置",
+        "净值日期": ["2025/8/15", "2025/8/18"], "组合净值": ["1,001.5", 2], "基准净值": [1, 1],
+    }), "净值")
+    assert df["组合代码"].astype(str).tolist() == ["0001", "0002"]
+    assert df["组合净值"].tolist() == [1001.5, 2.0]
+    assert df["净值日期"].dt.strftime("%Y-%m-%d").tolist() == ["2025-08-15", "2025-08-18"]
+
+    with pytest.raises(SchemaError, match="无法识别的日期"):
+        apply_schema(pd.DataFrame({"组合名称": ["股债平衡"], "起始日期": ["下周一"]}), "起始日期")
@@ -0,0 +1,334 @@
+"""
+一键生成报表（无弹窗，可在无图形界面的调度机上运行）
+
+依次完成：组合收益率计算(表格1) → 签解约客户数和资金增减(表格3) / 客户数和总资产(表格2) → 结果汇总(表格4)，
+各步骤之间直接在内存中传递 DataFrame，不再写出再读回中间 Excel。
+
+用法：
+    python 一键生成报表.py --nav 组合净值查询.xlsx --start-dates 组合起始日期.xlsx \\
+        --assets 总资产和客户数查询.xlsx --flow 签解约和资金增减查询.xlsx [--out-dir 输出目录]
+    python 一键生成报表.py --config 报表配置.toml
+    python 一键生成报表.py --history-store 基金数据.db --import-chart-workbook 表格5.xlsx   # 一次性导入表格5历史
+    python 一键生成报表.py --nav 组合净值查询.xlsx --start-dates 组合起始日期.xlsx \
+        --backfill-from 2025-08-01 --backfill-to 2025-08-31      # 回溯模式：只计算日期范围内每天的收益率
+    python 一键生成报表.py --config 报表配置.toml --format csv     # 输出 csv（或 parquet），默认 xlsx
+    python 一键生成报表.py --config 报表配置.toml --risk --risk-free 0.015   # 同时输出组合风险指标
+    python 一键生成报表.py --config 报表配置.toml --stream         # 客户级明细：逐块读取表格2/3的输入
+
+配置文件（TOML）示例，相对路径以配置文件所在目录为准：
+    nav = "组合净值查询.xlsx"
+    start_dates = "组合起始日期.xlsx"   # 组合配置.toml 中已填写全部起始日期时可省略
+    assets = "总资产和客户数查询.xlsx"
+    flow = "签解约和资金增减查询.xlsx"
+    out_dir = "输出"
+    keep_intermediate = false
+    nav_store = "基金数据.db"      # 可选：净值增量入库，收益率由库中最新两日数据计算
+    history_store = "基金数据.db"  # 可选：表格4 追加入报表历史库，供绘图直接读取
+    format = "xlsx"                # 可选：输出格式 xlsx / csv / parquet
+    risk = true                    # 可选：同时输出组合风险指标（最大回撤、波动率、夏普等）
+    risk_free = 0.015              # 可选：计算夏普比率用的年化无风险利率，默认 0
+    annualization = "compound"     # 可选：年化方式 linear（默认，累计收益/运行天数×365）/ compound（复利）
+    weighted_returns = true        # 可选：由报表历史计算时间加权、资金加权收益（需要 history_store）
+    stream = true                  # 可选：逐块读取 assets / flow（默认超过 64 MB 或 csv 时自动逐块读取）
+"""
+import argparse
+import datetime
+import os
+import sys
+import tomllib
+
+import pandas as pd
+
+from 报表输出 import SUPPORTED_FORMATS, output_path, write_table
+from 数据存储 import (ingest_nav, load_latest_nav, load_nav_history, load_report_history, save_flow_history,
+                      save_report_history)
+from 表格工具 import load_workbook_sheets, sheet_table
+from 读取缓存 import read_excel_many
+from 流式读取 import use_streaming
+from 计算基金组合收益率 import compute_net_value_result, compute_return_history
+from 计算客户数和总资产 import summarize_assets, summarize_assets_stream
+from 计算资金和客户数变化 import summarize_flow, summarize_flow_stream
+from 表格结果汇总 import DATE_FORMAT, build_final_table
+from 面板数据 import to_display
+from 表格结构 import SchemaError, check_header
+from 组合配置 import start_dates_complete, start_dates_table
+from 风险指标 import compute_risk_metrics
+from 收益引擎 import ANNUALIZATION_METHODS, compute_flow_returns
+from 运行记录 import run_main, stage
+
+INPUT_KEYS = ["nav", "start_dates", "assets", "flow"]
+# 各输入文件对应的表格结构（表格结构.SCHEMAS）
+INPUT_SCHEMAS = {"nav": "净值", "start_dates": "起始日期", "assets": "资产", "flow": "资金"}
+
+
+def load_config(config_path):
+    """读取 TOML 配置，并把其中的相对路径转换为以配置文件目录为基准的绝对路径"""
+    with open(config_path, "rb") as f:
+        cfg = tomllib.load(f)
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    for key in INPUT_KEYS + ["out_dir", "nav_store", "history_store"]:
+        if cfg.get(key):
+            cfg[key] = os.path.join(base_dir, cfg[key])
+    return cfg
+
+
+def check_inputs(cfg, keys):
+    """只读表头校验输入文件的列，在读取数据、计算之前发现缺列的文件；全部通过时返回 True"""
+    for key in keys:
+        if not cfg.get(key) or (key == "start_dates" and start_dates_complete()):
+            continue
+        try:
+            check_header(cfg[key], INPUT_SCHEMAS[key])
+        except (SchemaError, OSError) as e:
+            print(f"❌ {e}")
+            return False
+    return True
+
+
+def read_inputs(paths):
+    """
+    同时读取各输入表格（没有缓存的文件在进程池中并行解析），返回 {键: DataFrame}；路径为空的键不读取。
+    起始日期表格在组合配置.toml 已填写全部起始日期时不读取。
+    """
+    if start_dates_complete():
+        paths = dict(paths, start_dates=None)
+    keys = [key for key, path in paths.items() if path]
+    return dict(zip(keys, read_excel_many([paths[key] for key in keys])))
+
+
+def run_pipeline(nav, start_dates, assets, flow, out_dir=".", keep_intermediate=False, nav_store=None,
+                 history_store=None, fmt="xlsx", risk=False, risk_free=0.0, annualization=None,
+                 weighted_returns=False, stream=None):
+    """
+    运行完整的日报流程，返回基金数据统计结果（表格4）DataFrame；任一步骤失败时返回 None。
+    keep_intermediate=True 时额外写出表格1/2/3，便于与手工流程核对。
+    nav_store 为净值库路径时，先把 nav 中的新增行入库（nav 可为空），再用库中最新两日的数据计算收益率。
+    history_store 为报表历史库路径时，把表格4追加入库，绘图可直接从库中读取；表格3按 t 日存入资金历史，
+    供 区间资金汇总.py 计算本周、本月等区间合计。
+    fmt：输出格式 xlsx / csv / parquet。
+    risk=True 时用完整净值历史（净值库或 nav 表格）计算各组合风险指标，另存为“组合风险指标”表。
+    annualization：年化方式 linear / compound，默认取 计算基金组合收益率.ANNUALIZATION。
+    weighted_returns=True 时由报表历史库计算各组合时间加权、资金加权收益，另存为“组合加权收益率”表。
+    stream：True / False 时 assets、flow 总是 / 从不逐块读取，None 时按 流式读取.use_streaming 自动判断（csv 总是逐块读取）。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    yesterday_str = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+
+    # === 0) 同时读取各输入表格，总耗时约等于最慢的一个文件；逐块读取的表格在汇总时再读 ===
+    stream_assets = use_streaming(assets, stream)
+    stream_flow = use_streaming(flow, stream)
+    with stage("读取-输入表格"):
+        frames = read_inputs({"nav": nav, "start_dates": start_dates,
+                              "assets": None if stream_assets else assets, "flow": None if stream_flow else flow})
+    df_start = start_dates_table(frames.get("start_dates"))
+
+    # === 1) 组合收益率 ===
+    if nav_store:
+        if nav:
+            with stage("净值入库", rows_in=frames["nav"]):
+                n_new = ingest_nav(frames["nav"], nav_store)
+            print(f"✅ 净值入库完成，新增 {n_new} 条记录")
+        with stage("读取-净值库最新两日") as st:
+            df_nav = st.rows(load_latest_nav(nav_store))
+    else:
+        df_nav = frames["nav"]
+    with stage("计算-组合收益率", rows_in=df_nav) as st:
+        result = compute_net_value_result(df_nav, df_start, annualization)
+        if result is None:
+            return None
+        df_returns, t_date, t_1_date = result
+        st.rows(df_returns)
+    print(f"✅ 收益率计算完成：{t_date} 全部数据 + {t_1_date} 的活钱管理策略，共 {len(df_returns)} 条记录")
+
+    # === 2) 客户数和总资产 ===
+    if stream_assets:
+        df_assets = summarize_assets_stream(assets)
+    else:
+        with stage("计算-客户数和总资产", rows_in=frames["assets"]) as st:
+            df_assets = st.rows(summarize_assets(frames["assets"]))
+    print(f"✅ 客户数和总资产汇总完成，共 {len(df_assets)} 个组合")
+
+    # === 3) 签解约客户数和资金增减 ===
+    if stream_flow:
+        df_flow = summarize_flow_stream(flow)
+    else:
+        with stage("计算-签解约和资金", rows_in=frames["flow"]) as st:
+            df_flow = st.rows(summarize_flow(frames["flow"]))
+    if df_flow is None:
+        return None
+    print(f"✅ 签解约客户数和资金增减汇总完成，共 {len(df_flow)} 个组合")
+
+    if keep_intermediate:
+        with stage("写出-表格1/2/3"):
+            write_table(df_returns, output_path(out_dir, f"组合收益率计算结果_{yesterday_str}", fmt))
+            write_table(df_assets, output_path(out_dir, f"客户数和总资产计算结果_{yesterday_str}", fmt))
+            write_table(df_flow, output_path(out_dir, f"签解约客户数和资金增减计算结果_{yesterday_str}", fmt))
+
+    # === 4) 结果汇总 ===
+    with stage("结果汇总", rows_in=df_returns) as st:
+        df_final = st.rows(build_final_table(df_returns, df_flow, df_assets))
+    with stage("写出-结果汇总", rows_in=df_final):
+        final_path = write_table(to_display(df_final, DATE_FORMAT),
+                                 output_path(out_dir, f"基金数据统计结果_{yesterday_str}", fmt))
+    print(f"✅ 合并完成，已保存到：{final_path}")
+
+    if history_store:
+        with stage("报表历史入库", rows_in=df_final):
+            n_rows = save_report_history(df_final, history_store)
+            # 只保存表格4中的组合，“客户去重”等标记行不入库
+            n_flows = save_flow_history(df_flow[df_flow["组合名称"].isin(df_returns["组合名称"])],
+                                        t_date, history_store)
+        print(f"✅ 报表历史入库完成，共 {n_rows} 条记录；资金历史 {t_date:%Y-%m-%d} 共 {n_flows} 个组合")
+
+    # === 5) 风险指标（可选）===
+    if risk:
+        with stage("读取-完整净值历史") as st:
+            df_full = st.rows(load_nav_history(nav_store) if nav_store else frames["nav"])
+        with stage("计算-风险指标", rows_in=df_full) as st:
+            df_risk = st.rows(compute_risk_metrics(df_full, risk_free=risk_free))
+        with stage("写出-风险指标", rows_in=df_risk):
+            risk_path = write_table(df_risk, output_path(out_dir, f"组合风险指标_{yesterday_str}", fmt))
+        print(f"✅ 风险指标计算完成，共 {len(df_risk)} 个组合，已保存到：{risk_path}")
+
+    # === 6) 时间加权 / 资金加权收益（可选）===
+    if weighted_returns and history_store:
+        with stage("读取-报表历史") as st:
+            df_report = st.rows(load_report_history(history_store))
+        with stage("计算-加权收益率", rows_in=df_report) as st:
+            df_weighted = st.rows(compute_flow_returns(df_report))
+        with stage("写出-加权收益率", rows_in=df_weighted):
+            weighted_path = write_table(df_weighted, output_path(out_dir, f"组合加权收益率_{yesterday_str}", fmt))
+        print(f"✅ 时间加权、资金加权收益计算完成，共 {len(df_weighted)} 个组合，已保存到：{weighted_path}")
+    return df_final
+
+
+def import_chart_workbook(xls_path, history_store):
+    """把手工维护的表格5（每个组合一个 sheet，第41行为表头）一次性导入报表历史库，返回导入的行数"""
+    total = 0
+    for sheet_name, raw in load_workbook_sheets(xls_path).items():
+        df = sheet_table(raw, skiprows=40)
+        if "日期" not in df.columns or "组合名称" not in df.columns:
+            print(f"ℹ️ 『{sheet_name}』不是组合数据sheet，跳过。")
+            continue
+        df = df.dropna(subset=["日期"])
+        df = df[pd.to_datetime(df["日期"], errors="coerce").notna()]
+        n_rows = save_report_history(df, history_store)
+        print(f"✅ 『{sheet_name}』导入 {n_rows} 条记录")
+        total += n_rows
+    return total
+
+
+def run_backfill(nav, start_dates, date_from=None, date_to=None, out_dir=".", nav_store=None, fmt="xlsx",
+                 annualization=None):
+    """
+    回溯模式：计算日期范围内每个组合每天的收益率，输出长表，返回该 DataFrame。
+    nav_store 为净值库路径时，先把 nav 中的新增行入库（nav 可为空），再按日期范围从库中读取。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with stage("读取-输入表格"):
+        frames = read_inputs({"nav": nav, "start_dates": start_dates})
+    df_start = start_dates_table(frames.get("start_dates"))
+
+    if nav_store:
+        if nav:
+            with stage("净值入库", rows_in=frames["nav"]):
+                n_new = ingest_nav(frames["nav"], nav_store)
+            print(f"✅ 净值入库完成，新增 {n_new} 条记录")
+        with stage("读取-净值库") as st:
+            df_nav = st.rows(load_nav_history(nav_store, start=date_from, end=date_to))
+    else:
+        df_nav = frames["nav"]
+    with stage("计算-回溯收益率", rows_in=df_nav) as st:
+        df_history = st.rows(compute_return_history(df_nav, df_start, date_from, date_to, annualization))
+    if df_history.empty:
+        print("❌ 日期范围内没有净值数据。")
+        return df_history
+
+    first, last = (f"{d:%Y-%m-%d}" for d in (df_history["净值日期"].min(), df_history["净值日期"].max()))
+    with stage("写出-回溯结果", rows_in=df_history):
+        history_path = write_table(df_history, output_path(out_dir, f"组合收益率回溯结果_{first}_{last}", fmt))
+    print(f"✅ 回溯完成：{first} ~ {last}，共 {len(df_history)} 条记录，已保存到：{history_path}")
+    return df_history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="一键生成基金投顾组合日报（无弹窗）")
+    parser.add_argument("--config", help="TOML 配置文件，命令行参数优先于配置文件")
+    parser.add_argument("--nav", help="组合净值查询表格")
+    parser.add_argument("--start-dates", dest="start_dates", help="组合起始日期表格")
+    parser.add_argument("--assets", help="总资产和客户数查询表格")
+    parser.add_argument("--flow", help="签解约和资金增减查询表格")
+    parser.add_argument("--nav-store", dest="nav_store", help="净值库（SQLite）路径，启用净值增量入库")
+    parser.add_argument("--history-store", dest="history_store", help="报表历史库（SQLite）路径，表格4追加入库")
+    parser.add_argument("--import-chart-workbook", dest="import_chart_workbook",
+                        help="把表格5中各组合的历史数据一次性导入 --history-store 指定的库")
+    parser.add_argument("--out-dir", dest="out_dir", help="输出目录（默认当前目录）")
+    parser.add_argument("--backfill-from", dest="backfill_from", help="回溯模式起始日期（含），如 2025-08-01")
+    parser.add_argument("--backfill-to", dest="backfill_to", help="回溯模式结束日期（含），默认到最新净值日期")
+    parser.add_argument("--format", dest="format", choices=SUPPORTED_FORMATS,
+                        help="输出格式（默认 xlsx；csv 为 UTF-8 带 BOM，parquet 需要 pyarrow）")
+    parser.add_argument("--risk", action="store_true", default=None,
+                        help="同时输出组合风险指标（最大回撤、波动率、夏普、卡玛、跟踪误差、信息比率、近1月/3月/今年以来收益）")
+    parser.add_argument("--risk-free", dest="risk_free", type=float, help="年化无风险利率，如 0.015（默认 0）")
+    parser.add_argument("--annualization", choices=ANNUALIZATION_METHODS,
+                        help="年化方式：linear 为 累计收益/运行天数×365（默认），compound 为复利年化")
+    parser.add_argument("--weighted-returns", dest="weighted_returns", action="store_true", default=None,
+                        help="由 --history-store 中的报表历史计算时间加权、资金加权（IRR）收益")
+    parser.add_argument("--stream", action="store_true", default=None,
+                        help="逐块读取 --assets / --flow（客户级明细），内存占用不随文件增大")
+    parser.add_argument("--keep-intermediate", dest="keep_intermediate", action="store_true", default=None,
+                        help="同时输出中间结果表格1/2/3")
+    args = parser.parse_args(argv)
+
+    cfg = load_config(args.config) if args.config else {}
+    for key, value in vars(args).items():
+        if key != "config" and value is not None:
+            cfg[key] = value
+
+    if cfg.get("import_chart_workbook"):
+        if not cfg.get("history_store"):
+            parser.error("--import-chart-workbook 需要同时指定 --history-store")
+        import_chart_workbook(cfg["import_chart_workbook"], cfg["history_store"])
+        return 0
+    if cfg.get("weighted_returns") and not cfg.get("history_store"):
+        parser.error("--weighted-returns 需要同时指定 --history-store")
+
+    backfill = bool(cfg.get("backfill_from") or cfg.get("backfill_to"))
+    required = ["nav", "start_dates"] if backfill else INPUT_KEYS
+    optional = {"nav": bool(cfg.get("nav_store")), "start_dates": start_dates_complete()}
+    missing = [k for k in required if not cfg.get(k) and not optional.get(k)]
+    if missing:
+        parser.error(f"缺少输入文件：{', '.join(missing)}")
+    with stage("校验-表头"):
+        if not check_inputs(cfg, required):
+            return 1
+
+    if backfill:
+        df_history = run_backfill(
+            cfg.get("nav"), cfg.get("start_dates"), cfg.get("backfill_from"), cfg.get("backfill_to"),
+            out_dir=cfg.get("out_dir") or os.getcwd(),
+            nav_store=cfg.get("nav_store"),
+            fmt=cfg.get("format") or "xlsx",
+            annualization=cfg.get("annualization"),
+        )
+        return 0 if not df_history.empty else 1
+
+    df_final = run_pipeline(
+        cfg.get("nav"), cfg.get("start_dates"), cfg["assets"], cfg["flow"],
+        out_dir=cfg.get("out_dir") or os.getcwd(),
+        keep_intermediate=bool(cfg.get("keep_intermediate")),
+        nav_store=cfg.get("nav_store"),
+        history_store=cfg.get("history_store"),
+        fmt=cfg.get("format") or "xlsx",
+        risk=bool(cfg.get("risk")),
+        risk_free=float(cfg.get("risk_free") or 0.0),
+        annualization=cfg.get("annualization"),
+        weighted_returns=bool(cfg.get("weighted_returns")),
+        stream=cfg.get("stream"),
+    )
+    return 0 if df_final is not None else 1
+
+
+# === 运行主程序 ===
+if __name__ == "__main__":
+    sys.exit(run_main(main))
@@ -0,0 +1,133 @@
+"""
+区间资金汇总：各组合在任意区间（本周、本月、本季、本年、自定义起止日期）内的签解约客户数和资金增减
+
+每天的签解约客户数和资金增减汇总结果由 一键生成报表.py --history-store 存入资金历史（数据存储.flow_history）。
+FlowIndex 一次读出全部日度数据，建成 日期 × 组合 的累计和数组（首行补 0）：
+区间 [起, 止] 的合计 = 累计[止] - 累计[起之前]，两次二分查找加一次相减，与区间长短无关，
+一次运行即可输出所有组合、所有区间的合计，不必为每个区间重新导出、重新汇总。
+
+用法：
+    python 区间资金汇总.py --store 基金数据.db                         # 截至最新日期的本周、本月、本季、本年
+    python 区间资金汇总.py --store 基金数据.db --to 2025-08-15         # 截至指定日期
+    python 区间资金汇总.py --store 基金数据.db --from 2025-07-01 --to 2025-07-31   # 另加自定义区间
+    python 区间资金汇总.py --store 基金数据.db --seed-from-reports     # 先用报表历史补齐资金历史
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from 报表输出 import SUPPORTED_FORMATS, output_path, write_table
+from 数据存储 import DEFAULT_DB, FLOW_COLUMNS, load_flow_history, seed_flow_history
+from 运行记录 import run_main, stage
+
+COUNT_COLUMNS = ["签约客户数(户)", "解约客户数(户)"]
+
+
+class FlowIndex:
+    """日度资金数据的累计和索引：cum[k] 为前 k 个日期的合计（cum[0] 为 0），形状 (日期数 + 1, 组合数, 列数)"""
+
+    def __init__(self, df):
+        df = df.dropna(subset=["组合名称", "日期"])
+        days = pd.to_datetime(df["日期"]).to_numpy().astype("datetime64[D]")
+        self.dates = np.unique(days)
+        names = pd.Categorical(df["组合名称"].astype(str))
+        self.names = list(names.categories)
+
+        daily = np.zeros((len(self.dates), len(self.names), len(FLOW_COLUMNS)))
+        np.add.at(daily, (np.searchsorted(self.dates, days), names.codes),
+                  df[FLOW_COLUMNS].to_numpy(dtype=float, na_value=0.0))
+        self.cum = np.concatenate([np.zeros((1,) + daily.shape[1:]), daily.cumsum(axis=0)])
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1]) if len(self.dates) else None
+
+    def totals(self, start, end):
+        """区间 [start, end]（含首尾）内各组合的合计，返回 (DataFrame, 区间内有数据的天数)"""
+        i = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), "D"), side="left")
+        j = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).date(), "D"), side="right")
+        df = pd.DataFrame(self.cum[max(j, i)] - self.cum[i], columns=FLOW_COLUMNS)
+        # 累计和相减会留下浮点尾差：户数取整，金额保留到分
+        df[COUNT_COLUMNS] = df[COUNT_COLUMNS].round().astype("int64")
+        df[["转入资金(元)", "转出资金(元)"]] = df[["转入资金(元)", "转出资金(元)"]].round(2)
+        df.insert(0, "组合名称", self.names)
+        return df, max(j - i, 0)
+
+
+def standard_periods(end):
+    """截至 end 的本周（周一起）、本月、本季、本年，返回 [(区间名称, 起始日期, 截止日期), ...]"""
+    end = pd.Timestamp(end).normalize()
+    return [
+        ("本周", end - pd.Timedelta(days=end.weekday()), end),
+        ("本月", end.replace(day=1), end),
+        ("本季", end.to_period("Q").start_time, end),
+        ("本年", end.replace(month=1, day=1), end),
+    ]
+
+
+def period_table(index, periods):
+    """各区间、各组合的合计拼成一张长表（区间、起止日期、组合名称、户数、资金及万元金额、净流入）"""
+    parts = []
+    for label, start, end in periods:
+        df, n_days = index.totals(start, end)
+        df.insert(0, "区间", label)
+        df.insert(1, "起始日期", pd.Timestamp(start).date())
+        df.insert(2, "截止日期", pd.Timestamp(end).date())
+        df.insert(3, "数据天数", n_days)
+        parts.append(df)
+    df = pd.concat(parts, ignore_index=True)
+    df["新增金额（万元）"] = df["转入资金(元)"] / 10000
+    df["减少金额（万元）"] = df["转出资金(元)"] / 10000
+    df["净流入（万元）"] = (df["转入资金(元)"] - df["转出资金(元)"]) / 10000
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="各组合任意区间的签解约客户数和资金增减")
+    parser.add_argument("--store", default=os.environ.get("FUND_HISTORY_DB") or DEFAULT_DB,
+                        help="报表历史库（SQLite），默认取环境变量 FUND_HISTORY_DB 或脚本目录下的 基金数据.db")
+    parser.add_argument("--to", dest="date_to", help="截止日期（含），默认资金历史中的最新日期")
+    parser.add_argument("--from", dest="date_from", help="自定义区间的起始日期（含），与 --to 组成一个额外区间")
+    parser.add_argument("--seed-from-reports", dest="seed", action="store_true",
+                        help="先用报表历史中的签约/解约客户数、新增/减少金额补齐资金历史")
+    parser.add_argument("--out-dir", dest="out_dir", default=os.getcwd(), help="输出目录（默认当前目录）")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default="xlsx", help="输出格式（默认 xlsx）")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        with stage("补齐资金历史"):
+            n_rows = seed_flow_history(args.store)
+        print(f"✅ 已用报表历史补齐资金历史 {n_rows} 条记录")
+
+    with stage("读取-资金历史") as st:
+        df = st.rows(load_flow_history(args.store))
+    with stage("建立累计和索引", rows_in=df):
+        index = FlowIndex(df)
+    if index.last_date is None:
+        print(f"❌ 资金历史为空：{args.store}（需先用 一键生成报表.py --history-store 入库，或加 --seed-from-reports）")
+        return 1
+
+    end = pd.Timestamp(args.date_to) if args.date_to else index.last_date
+    periods = standard_periods(end)
+    if args.date_from:
+        if pd.Timestamp(args.date_from) > end:
+            parser.error("--from 不能晚于截止日期")
+        periods.append(("自定义", pd.Timestamp(args.date_from), end))
+
+    with stage("区间汇总", rows_in=len(periods)) as st:
+        df_periods = st.rows(period_table(index, periods))
+    os.makedirs(args.out_dir, exist_ok=True)
+    with stage("写出", rows_in=df_periods):
+        path = write_table(df_periods, output_path(args.out_dir, f"区间资金汇总_{end:%Y-%m-%d}", args.format))
+    for label, start, stop in periods:
+        print(f"📌 {label}：{start:%Y-%m-%d} ~ {stop:%Y-%m-%d}")
+    print(f"✅ 区间资金汇总完成，共 {len(index.names)} 个组合、{len(periods)} 个区间，已保存到：{path}")
+    return 0
+
+
+# === 运行主程序 ===
+if __name__ == "__main__":
+    sys.exit(run_main(main))
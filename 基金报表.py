@@ -0,0 +1,235 @@
+"""
+基金报表：统一命令行入口，子命令用到哪个模块才导入哪个模块
+
+只校验配置、查看帮助时不导入 pandas / matplotlib / tkinter / xlsxwriter，调度机频繁调用时启动更快。
+
+用法：
+    python 基金报表.py returns                   # 计算基金组合收益率（弹窗选择文件，同 计算基金组合收益率.py）
+    python 基金报表.py assets                    # 计算客户数和总资产
+    python 基金报表.py flow                      # 计算资金和客户数变化
+    python 基金报表.py merge                     # 表格结果汇总
+    python 基金报表.py plot                      # 自动绘图
+    python 基金报表.py report --config 报表配置.toml   # 一键生成报表，参数同 一键生成报表.py
+    python 基金报表.py bench --days 500          # 性能测试，参数同 性能测试.py
+    python 基金报表.py periods --store 基金数据.db  # 本周/本月/本季/本年等区间的资金汇总，参数同 区间资金汇总.py
+    python 基金报表.py check [报表配置.toml]      # 校验组合配置.toml（及报表配置），不导入 pandas
+    python 基金报表.py startup [--budget-ms 300]  # 测量启动耗时和各重依赖的导入耗时，超出预算时返回 1
+"""
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PLOT_SCRIPT = os.path.join(SCRIPT_DIR, "自动绘图基于3.13版本.py")
+
+# 报表配置中按文件路径处理的键（与 一键生成报表.load_config 一致）
+REPORT_PATH_KEYS = ["nav", "start_dates", "assets", "flow", "out_dir", "nav_store", "history_store"]
+# 报表配置中的输入文件及其表格结构（与 一键生成报表.INPUT_SCHEMAS 一致）
+REPORT_INPUT_SCHEMAS = {"nav": "净值", "start_dates": "起始日期", "assets": "资产", "flow": "资金"}
+
+# startup 子命令测量导入耗时的依赖
+HEAVY_MODULES = ["pandas", "matplotlib.pyplot", "tkinter", "xlsxwriter"]
+
+
+# === 交互式脚本（成功返回 0，未选择文件等失败返回 1）===
+def run_returns(argv):
+    from 计算基金组合收益率 import process_net_value_file
+    from 运行记录 import run_main
+    return run_main(process_net_value_file) or 0
+
+
+def run_assets(argv):
+    from 计算客户数和总资产 import process_excel_summary
+    from 运行记录 import run_main
+    return run_main(process_excel_summary) or 0
+
+
+def run_flow(argv):
+    from 计算资金和客户数变化 import summarize_contract_flow
+    from 运行记录 import run_main
+    return run_main(summarize_contract_flow) or 0
+
+
+def run_merge(argv):
+    from 表格结果汇总 import merge_combination_data
+    from 运行记录 import run_main
+    return run_main(merge_combination_data) or 0
+
+
+def run_plot(argv):
+    # 绘图脚本文件名中带有“3.13”，不能直接 import，按文件路径加载
+    import importlib.util
+    from 运行记录 import run_main
+    spec = importlib.util.spec_from_file_location("自动绘图", PLOT_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # 并行绘图的子进程从 绘图.py 按模块名找回出图函数，这里按路径加载的只是选择文件、准备数据的部分
+    spec.loader.exec_module(module)
+    return run_main(module.main) or 0
+
+
+# === 无弹窗脚本 ===
+def run_report(argv):
+    import 一键生成报表
+    from 运行记录 import run_main
+    return run_main(一键生成报表.main, argv)
+
+
+def run_bench(argv):
+    import 性能测试
+    return 性能测试.main(argv)
+
+
+def run_periods(argv):
+    import 区间资金汇总
+    from 运行记录 import run_main
+    return run_main(区间资金汇总.main, argv)
+
+
+# === 配置校验 ===
+def check_config(argv):
+    """校验组合配置.toml 和（可选）报表配置 TOML：能否解析、组合是否重复、引用的输入文件是否存在、表头是否齐全"""
+    import argparse
+    import tomllib
+    from 组合配置 import AXIS_KEYS, config_path, load_portfolios
+    from 表格结构 import SchemaError, check_header
+
+    parser = argparse.ArgumentParser(prog="基金报表.py check", description="校验组合配置和报表配置")
+    parser.add_argument("report_config", nargs="?", help="一键生成报表的 TOML 配置文件")
+    args = parser.parse_args(argv)
+
+    errors = 0
+    path = config_path()
+    try:
+        portfolios = load_portfolios()
+    except (OSError, ValueError, tomllib.TOMLDecodeError) as e:
+        print(f"❌ 组合配置有误：{e}")
+        return 1
+    if not portfolios:
+        print(f"⚠️ 未找到组合配置或其中没有组合：{path}")
+    else:
+        n_dates = sum(p.get("start_date") is not None for p in portfolios)
+        n_axes = sum(all(p.get(k) is not None for k in AXIS_KEYS) for p in portfolios)
+        print(f"✅ 组合配置：{len(portfolios)} 个组合，起始日期 {n_dates} 个，坐标轴参数 {n_axes} 个")
+        for p in portfolios:
+            partial = [k for k in AXIS_KEYS if p.get(k) is not None]
+            if partial and len(partial) < len(AXIS_KEYS):
+                print(f"⚠️ 组合『{p['name']}』只填写了部分坐标轴参数，将改用轴参数工作簿中的设置")
+
+    if args.report_config:
+        try:
+            with open(args.report_config, "rb") as f:
+                cfg = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            print(f"❌ 报表配置有误：{e}")
+            return 1
+        base_dir = os.path.dirname(os.path.abspath(args.report_config))
+        for key, schema in REPORT_INPUT_SCHEMAS.items():
+            if not cfg.get(key):
+                continue
+            path = os.path.join(base_dir, cfg[key])
+            if not os.path.exists(path):
+                print(f"❌ 报表配置中 {key} 指向的文件不存在：{cfg[key]}")
+                errors += 1
+                continue
+            try:
+                check_header(path, schema)
+            except (SchemaError, OSError) as e:
+                print(f"❌ {e}")
+                errors += 1
+        unknown = sorted(set(cfg) - set(REPORT_PATH_KEYS) - {
+            "keep_intermediate", "format", "risk", "risk_free", "annualization", "weighted_returns",
+            "backfill_from", "backfill_to", "import_chart_workbook", "stream"})
+        if unknown:
+            print(f"⚠️ 报表配置中有未识别的键：{', '.join(unknown)}")
+        if not errors:
+            print(f"✅ 报表配置：{args.report_config}")
+    return 1 if errors else 0
+
+
+# === 启动耗时 ===
+def _time_command(cmd, repeat):
+    """在新进程中运行 cmd repeat 次，返回最短耗时（毫秒）；运行失败返回 None"""
+    import subprocess
+    import time
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        done = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=SCRIPT_DIR)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if done.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_startup(argv):
+    """测量解释器启动、本入口的 --help / check，以及各重依赖的导入耗时（各取多次运行的最短值）"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="基金报表.py startup", description="测量启动耗时")
+    parser.add_argument("--repeat", type=int, default=5, help="每项运行次数，取最短耗时（默认 5）")
+    parser.add_argument("--budget-ms", dest="budget_ms", type=float, default=300,
+                        help="--help 和 check 的耗时预算（毫秒，默认 300）")
+    args = parser.parse_args(argv)
+
+    py = sys.executable
+    me = os.path.abspath(__file__)
+    budgeted = [("基金报表.py --help", [py, me, "--help"]), ("基金报表.py check", [py, me, "check"])]
+    others = [("python -c pass", [py, "-c", "pass"])]
+    others += [(f"import {m}", [py, "-c", f"import {m}"]) for m in HEAVY_MODULES]
+
+    over = []
+    for label, cmd in others + budgeted:
+        ms = _time_command(cmd, args.repeat)
+        if ms is None:
+            print(f"ℹ️ {label}：运行失败（未安装？）")
+            continue
+        note = ""
+        if (label, cmd) in budgeted:
+            note = f"（预算 {args.budget_ms:.0f} ms）"
+            if ms > args.budget_ms:
+                over.append(label)
+        print(f"📌 {label}：{ms:.0f} ms{note}")
+
+    if over:
+        print(f"❌ 超出启动耗时预算：{', '.join(over)}")
+        return 1
+    print("✅ 启动耗时均在预算内。")
+    return 0
+
+
+COMMANDS = {
+    "returns": (run_returns, "计算基金组合收益率（表格1）"),
+    "assets": (run_assets, "计算客户数和总资产（表格2）"),
+    "flow": (run_flow, "计算资金和客户数变化（表格3）"),
+    "merge": (run_merge, "表格结果汇总（表格4）"),
+    "plot": (run_plot, "自动绘图"),
+    "report": (run_report, "一键生成报表（无弹窗）"),
+    "bench": (run_bench, "性能测试"),
+    "periods": (run_periods, "区间资金汇总（本周/本月/本季/本年/自定义）"),
+    "check": (check_config, "校验组合配置和报表配置"),
+    "startup": (measure_startup, "测量启动耗时"),
+}
+
+
+def print_help():
+    print("用法：python 基金报表.py <子命令> [参数]\n\n子命令：")
+    for name, (_, text) in COMMANDS.items():
+        print(f"  {name:<8} {text}")
+    print("\n各子命令的参数见 python 基金报表.py <子命令> --help（交互式脚本无参数）")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print_help()
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ 未知子命令：{command}")
+        print_help()
+        return 2
+    return COMMANDS[command][0](rest)
+
+
+# === 运行主程序 ===
+if __name__ == "__main__":
+    sys.exit(main())
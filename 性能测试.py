@@ -0,0 +1,261 @@
+"""
+性能测试：用合成数据测量各环节耗时和内存峰值
+
+按真实列名（净值日期、组合净值、基准净值、客户数、总资产(元)、转入资金(元) 等）生成任意规模的
+组合净值查询 / 总资产和客户数查询 / 签解约和资金增减查询数据，依次测量：
+读取（read_excel）→ 计算（收益率 / 回溯 / 风险指标 / 客户数和总资产 / 签解约和资金）→ 合并 → 写出 → 绘图。
+
+用法：
+    python 性能测试.py --portfolios 14 --days 250
+    python 性能测试.py --portfolios 5000 --days 20 --json 结果.json
+    python 性能测试.py --baseline 结果.json --tolerance 0.3     # 任一环节比基线慢 30% 以上时返回非 0
+
+说明：内存峰值由 tracemalloc 统计，会让耗时略微偏大，只比较耗时时可加 --no-memory；
+合成的净值数据超过 Excel 行数上限时跳过“读取”环节，其余环节直接在内存中测量。
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from 报表输出 import write_table
+from 计算基金组合收益率 import compute_net_value_result, compute_return_history
+from 计算客户数和总资产 import summarize_assets
+from 计算资金和客户数变化 import summarize_flow
+from 表格结果汇总 import DATE_FORMAT, build_final_table
+from 组合配置 import portfolio_order
+from 风险指标 import compute_risk_metrics
+from 面板数据 import memory_mb, to_display
+
+# 合成数据的前 14 个组合使用 组合配置.toml 中的真实名称（按登记顺序）
+KNOWN_NAMES = portfolio_order()
+EXCEL_MAX_ROWS = 1_048_575
+
+
+# ========== 合成数据 ==========
+def portfolio_names(n_portfolios: int) -> list:
+    extra = [f"测试组合{i:04d}" for i in range(len(KNOWN_NAMES) + 1, n_portfolios + 1)]
+    return (KNOWN_NAMES + extra)[:n_portfolios]
+
+
+def make_nav(n_portfolios: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """组合净值查询：每个组合每个工作日一行，净值按随机游走生成"""
+    rng = np.random.default_rng(seed)
+    names = portfolio_names(n_portfolios)
+    dates = pd.bdate_range(end="2025-08-18", periods=n_days)
+    nav = np.cumprod(1 + rng.normal(3e-4, 5e-3, (n_days, n_portfolios)), axis=0)
+    bench = np.cumprod(1 + rng.normal(2e-4, 4e-3, (n_days, n_portfolios)), axis=0)
+    return pd.DataFrame({
+        "组合代码": np.tile(np.arange(1, n_portfolios + 1), n_days),
+        "组合名称": np.tile(names, n_days),
+        "策略名称": np.tile(["活钱管理" if n == "货币增强" else "稳健配置" for n in names], n_days),
+        "净值日期": np.repeat(dates, n_portfolios),
+        "组合净值": nav.ravel().round(4),
+        "基准净值": bench.ravel().round(4),
+    })
+
+
+def make_start_dates(n_portfolios: int, n_days: int) -> pd.DataFrame:
+    first = pd.bdate_range(end="2025-08-18", periods=n_days)[0]
+    return pd.DataFrame({"组合名称": portfolio_names(n_portfolios),
+                         "起始日期": first - pd.Timedelta(days=2)})
+
+
+def _fmt_thousands(values: np.ndarray, decimals: int) -> pd.Series:
+    """按导出表格的习惯，把数值写成带千分位逗号的文本"""
+    return pd.Series(values).map(lambda v: f"{v:,.{decimals}f}")
+
+
+def make_assets(n_portfolios: int, rows_per_portfolio: int, seed: int = 1) -> pd.DataFrame:
+    """总资产和客户数查询：每个组合若干机构行，末尾带“客户小计”行"""
+    rng = np.random.default_rng(seed)
+    n = n_portfolios * rows_per_portfolio
+    df = pd.DataFrame({
+        "机构名称": np.tile([f"分行{i:03d}" for i in range(rows_per_portfolio)], n_portfolios),
+        "组合名称": np.repeat(portfolio_names(n_portfolios), rows_per_portfolio),
+        "客户数": _fmt_thousands(rng.integers(10, 5000, n), 0),
+        "总资产(元)": _fmt_thousands(rng.uniform(1e4, 1e8, n), 2),
+    })
+    subtotal = pd.DataFrame({"机构名称": ["客户小计"], "组合名称": [None],
+                             "客户数": [f"{n * 100:,}"], "总资产(元)": [None]})
+    return pd.concat([df, subtotal], ignore_index=True)
+
+
+def make_flow(n_portfolios: int, rows_per_portfolio: int, seed: int = 2) -> pd.DataFrame:
+    """签解约和资金增减查询：每个组合若干机构行，末尾带“客户去重”行"""
+    rng = np.random.default_rng(seed)
+    n = n_portfolios * rows_per_portfolio
+    df = pd.DataFrame({
+        "机构名称": np.tile([f"分行{i:03d}" for i in range(rows_per_portfolio)], n_portfolios),
+        "组合名称": np.repeat(portfolio_names(n_portfolios), rows_per_portfolio),
+        "签约客户数(户)": rng.integers(0, 50, n),
+        "转入资金(元)": _fmt_thousands(rng.uniform(0, 1e6, n), 2),
+        "解约客户数(户)": rng.integers(0, 20, n),
+        "转出资金(元)": _fmt_thousands(rng.uniform(0, 1e6, n), 2),
+    })
+    dedup = pd.DataFrame({"机构名称": [None], "组合名称": ["客户去重"], "签约客户数(户)": [n * 10],
+                          "转入资金(元)": [None], "解约客户数(户)": [n * 2], "转出资金(元)": [None]})
+    return pd.concat([df, dedup], ignore_index=True)
+
+
+# ========== 计时 ==========
+class StageTimer:
+    """逐环节记录耗时（秒）和 tracemalloc 内存峰值（MB）"""
+
+    def __init__(self, track_memory: bool = True):
+        self.track_memory = track_memory
+        self.results = []
+
+    def run(self, stage: str, func, *args, **kwargs):
+        if self.track_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            peak = None
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+            self.results.append({"环节": stage, "耗时(秒)": round(elapsed, 4),
+                                 "内存峰值(MB)": None if peak is None else round(peak, 2)})
+            print(f"⏱️ {stage}：{elapsed:.3f} 秒" + ("" if peak is None else f"，内存峰值 {peak:.1f} MB"))
+
+
+def _load_plot_module():
+    """出图函数（与 自动绘图基于3.13版本.py 相同，见 绘图.py），使用无界面的 Agg 后端"""
+    import 绘图
+    绘图.pyplot().switch_backend("Agg")
+    return 绘图
+
+
+def _chart_frame(df_history: pd.DataFrame, name: str, rng) -> pd.DataFrame:
+    """把回溯结果中某个组合的历史整理成表格5的列，资产规模随机生成"""
+    g = df_history[df_history["组合名称"] == name]
+    assets = np.cumsum(rng.uniform(0, 100, len(g))) + 1000
+    return pd.DataFrame({
+        "日期": pd.to_datetime(g["净值日期"]).to_numpy(),
+        "组合累计收益*": g["组合累计收益"].to_numpy(),
+        "基准累计收益": g["基准累计收益"].to_numpy(),
+        "超额收益": g["超额收益"].to_numpy(),
+        "总资产（万元）": assets,
+        "总份额（万份）": assets / g["组合净值"].to_numpy(),
+    })
+
+
+def run_benchmark(n_portfolios: int, n_days: int, rows_per_portfolio: int = 3,
+                  plot_portfolios: int = 3, track_memory: bool = True) -> list:
+    timer = StageTimer(track_memory)
+    print(f"📌 规模：{n_portfolios} 个组合 × {n_days} 天，客户明细每组合 {rows_per_portfolio} 行")
+
+    df_nav = timer.run("生成数据", make_nav, n_portfolios, n_days)
+    df_start = make_start_dates(n_portfolios, n_days)
+    df_assets_raw = make_assets(n_portfolios, rows_per_portfolio)
+    df_flow_raw = make_flow(n_portfolios, rows_per_portfolio)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # === 读取：先写出合成表格（不计时），再测量 read_excel ===
+        if len(df_nav) <= EXCEL_MAX_ROWS:
+            paths = {}
+            for key, df in [("净值", df_nav), ("总资产和客户数", df_assets_raw), ("签解约和资金", df_flow_raw)]:
+                paths[key] = os.path.join(tmp, f"{key}.xlsx")
+                df.to_excel(paths[key], index=False)
+            for key, path in paths.items():
+                timer.run(f"读取-{key}", pd.read_excel, path)
+        else:
+            print(f"ℹ️ 净值数据 {len(df_nav)} 行，超出 Excel 行数上限，跳过读取环节。")
+
+        # === 计算 ===
+        # 只有 1 天时没有 t-1 日，无法计算当日收益率，跳过它和依赖它的合并环节
+        df_returns = None
+        if n_days >= 2:
+            df_returns, _, _ = timer.run("计算-组合收益率", compute_net_value_result, df_nav, df_start)
+        else:
+            print("ℹ️ 净值数据只有 1 天，没有 t-1 日，跳过“计算-组合收益率”“合并-结果汇总”“写出-结果汇总”环节。")
+        df_history = timer.run("计算-回溯收益率", compute_return_history, df_nav, df_start)
+        timer.run("计算-风险指标", compute_risk_metrics, df_nav)
+        df_assets = timer.run("计算-客户数和总资产", summarize_assets, df_assets_raw)
+        df_flow = timer.run("计算-签解约和资金", summarize_flow, df_flow_raw)
+        print(f"📌 回溯长表内存：键列为文本时 {memory_mb(to_display(df_history)):.1f} MB，"
+              f"category 键列 {memory_mb(df_history):.1f} MB")
+
+        # === 合并 / 写出 ===
+        if df_returns is not None:
+            df_final = timer.run("合并-结果汇总", build_final_table, df_returns, df_flow, df_assets)
+            timer.run("写出-结果汇总", write_table, to_display(df_final, DATE_FORMAT),
+                      os.path.join(tmp, "基金数据统计结果.xlsx"))
+        if len(df_history) <= EXCEL_MAX_ROWS:
+            timer.run("写出-回溯结果", write_table, df_history, os.path.join(tmp, "回溯结果.xlsx"))
+
+        # === 绘图 ===
+        if plot_portfolios > 0:
+            plot = _load_plot_module()
+            rng = np.random.default_rng(3)
+            row = {"left_min": np.nan, "left_max": np.nan, "left_step": np.nan,
+                   "right_min": np.nan, "right_max": np.nan, "right_step": np.nan}
+
+            def _plot_all():
+                for name in portfolio_names(n_portfolios)[:plot_portfolios]:
+                    df, cols = plot.prepare_sheet_data(_chart_frame(df_history, name, rng), name)
+                    plot.render_chart(name, df, cols, row, os.path.join(tmp, f"{name}.png"))
+
+            timer.run(f"绘图-{min(plot_portfolios, n_portfolios)}张", _plot_all)
+
+    return timer.results
+
+
+def compare_with_baseline(results: list, baseline_path: str, tolerance: float) -> list:
+    """返回比基线慢 tolerance 以上的环节列表"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["环节"]: r for r in json.load(f)["results"]}
+    slower = []
+    for r in results:
+        base = baseline.get(r["环节"])
+        if base and base["耗时(秒)"] > 0 and r["耗时(秒)"] > base["耗时(秒)"] * (1 + tolerance):
+            slower.append((r["环节"], base["耗时(秒)"], r["耗时(秒)"]))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用合成数据测量各环节耗时和内存峰值")
+    parser.add_argument("--portfolios", type=int, default=14, help="组合数（默认 14）")
+    parser.add_argument("--days", type=int, default=250, help="净值天数（默认 250）")
+    parser.add_argument("--rows-per-portfolio", type=int, default=3, help="客户明细表中每个组合的行数（默认 3）")
+    parser.add_argument("--plot-portfolios", type=int, default=3, help="参与绘图计时的组合数（默认 3，0 为不绘图）")
+    parser.add_argument("--no-memory", action="store_true", help="不统计内存峰值（耗时更准确）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，可作为以后比较的基线")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许比基线慢的比例（默认 0.2）")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.portfolios, args.days, args.rows_per_portfolio,
+                            args.plot_portfolios, track_memory=not args.no_memory)
+    print(pd.DataFrame(results).to_string(index=False))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"portfolios": args.portfolios, "days": args.days,
+                       "rows_per_portfolio": args.rows_per_portfolio, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已保存：{args.json}")
+
+    if args.baseline:
+        slower = compare_with_baseline(results, args.baseline, args.tolerance)
+        for stage, base, now in slower:
+            print(f"❌ {stage} 变慢：{base:.3f} 秒 → {now:.3f} 秒")
+        if slower:
+            return 1
+        print("✅ 各环节均未超过基线。")
+    return 0
+
+
+# === 运行主程序 ===
+if __name__ == "__main__":
+    sys.exit(main())
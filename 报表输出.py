@@ -0,0 +1,79 @@
+"""
+报表输出：按文件扩展名把结果表写成 xlsx / csv / parquet
+
+- xlsx：用 xlsxwriter 的 constant_memory 模式逐行流式写出，写过的行立即落盘，内存占用不随行数增长；
+  日期单元格统一显示为 yyyy/m/d，表头样式与 DataFrame.to_excel 相同
+- csv：UTF-8 带 BOM，Excel 直接打开不乱码
+- parquet：供不需要 Excel 的下游系统使用（需要 pyarrow）
+"""
+import datetime
+import math
+import os
+
+import pandas as pd
+
+SUPPORTED_FORMATS = ("xlsx", "csv", "parquet")
+# xlsx 每次转换、写出的行数
+CHUNK_ROWS = 10_000
+
+
+def output_path(out_dir, stem, fmt="xlsx"):
+    """拼出输出文件路径，如 output_path("输出", "基金数据统计结果_2025-08-18", "csv")"""
+    return os.path.join(out_dir, f"{stem}.{fmt}")
+
+
+def _cell_value(v):
+    """转成 xlsxwriter 能写的值：缺失值返回 None（留空），±inf 与 to_excel 一样写成文本"""
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, float):
+        if math.isnan(v):
+            return None
+        if math.isinf(v):
+            return "inf" if v > 0 else "-inf"
+    return v
+
+
+def write_xlsx_streaming(df, path, date_format="yyyy/m/d", sheet_name="Sheet1"):
+    """以 constant_memory 模式逐行写出 xlsx（不写索引）"""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_fmt = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        date_fmt = workbook.add_format({"num_format": date_format})
+
+        for c, name in enumerate(df.columns):
+            worksheet.write_string(0, c, str(name), header_fmt)
+
+        # 每次取 CHUNK_ROWS 行，逐列转成 Python 原生值（numpy 标量 → int/float，缺失 → None）后按行写出，
+        # 同一时刻只有一块转成了 Python 对象，内存占用不超过一块
+        for start in range(0, len(df), CHUNK_ROWS):
+            part = df.iloc[start:start + CHUNK_ROWS]
+            columns = [part[c].astype(object).where(part[c].notna(), None).tolist() for c in part.columns]
+            for r, values in enumerate(zip(*columns), start=start + 1):
+                for c, v in enumerate(values):
+                    v = _cell_value(v)
+                    if v is None:
+                        continue
+                    if isinstance(v, (datetime.date, datetime.datetime)):
+                        worksheet.write_datetime(r, c, v, date_fmt)
+                    else:
+                        worksheet.write(r, c, v)
+    finally:
+        workbook.close()
+
+
+def write_table(df, path, date_format="yyyy/m/d"):
+    """按扩展名（.xlsx / .csv / .parquet）写出结果表，不写索引"""
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt == "xlsx":
+        write_xlsx_streaming(df, path, date_format=date_format)
+    elif fmt == "csv":
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"不支持的输出格式：{fmt}（可选：{', '.join(SUPPORTED_FORMATS)}）")
+    return path
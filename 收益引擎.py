@@ -0,0 +1,119 @@
+"""
+收益引擎：年化方式、时间加权收益（TWR）和资金加权收益（IRR）
+
+- annualize：累计收益 → 年化收益，支持线性（累计收益 / 运行天数 × 365，与原报表一致）和复利两种方式
+- 时间加权收益：按日拆分，剔除当日资金转入转出的影响后连乘，衡量组合本身的投资表现
+- 资金加权收益：把期初资产、每日净转入和期末资产视为现金流求内部收益率（年化），反映客户实际获得的收益；
+  所有组合的牛顿迭代在同一个矩阵上同时进行，耗时与组合数基本无关
+
+时间加权 / 资金加权收益使用报表历史中的 总资产（万元）、新增金额（万元）、减少金额（万元），
+即每天的基金数据统计结果（数据存储.load_report_history 的返回格式）。
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ANNUALIZATION_METHODS = ("linear", "compound")
+
+
+def annualize(cum_return, days, method="compound"):
+    """
+    累计收益按运行天数年化（按 365 天）。
+    method="linear"：累计收益 / 天数 × 365；method="compound"：(1 + 累计收益) ^ (365 / 天数) - 1，天数不为正时为空。
+    """
+    if method == "linear":
+        return cum_return / days * 365
+    if method == "compound":
+        cum_return = np.asarray(cum_return, dtype=float)
+        days = np.asarray(days, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(days > 0, (1 + cum_return) ** (365.0 / days) - 1, np.nan)
+    raise ValueError(f"不支持的年化方式：{method}（可选：{', '.join(ANNUALIZATION_METHODS)}）")
+
+
+def _flow_panel(df):
+    """报表历史长表 → 日期 × 组合名称 的总资产、净转入矩阵（万元）"""
+    df = df.dropna(subset=["组合名称", "日期"]).copy()
+    df["日期"] = pd.to_datetime(df["日期"])
+    df["净转入"] = df["新增金额（万元）"].fillna(0) - df["减少金额（万元）"].fillna(0)
+    df = df.drop_duplicates(["日期", "组合名称"], keep="last")
+    panel = df.pivot(index="日期", columns="组合名称", values=["总资产（万元）", "净转入"]).sort_index()
+    return panel.astype(float)
+
+
+def batch_irr(cashflows, years, guess=0.05, tol=1e-10, max_iter=100):
+    """
+    批量求内部收益率（年化）：cashflows、years 均为 组合数 × 期数 的矩阵，
+    第 i 行的现金流满足 Σ cashflows[i, t] / (1 + r_i) ^ years[i, t] = 0。
+    所有组合同时做牛顿迭代；不收敛或现金流同号（无解）的组合为 NaN。
+    """
+    cashflows = np.nan_to_num(np.asarray(cashflows, dtype=float))
+    years = np.nan_to_num(np.asarray(years, dtype=float))
+    rate = np.full(cashflows.shape[0], guess, dtype=float)
+    done = np.zeros_like(rate, dtype=bool)
+    solvable = (cashflows > 0).any(axis=1) & (cashflows < 0).any(axis=1)
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        for _ in range(max_iter):
+            active = solvable & ~done
+            if not active.any():
+                break
+            r = rate[active, None]
+            discount = (1 + r) ** -years[active]
+            npv = (cashflows[active] * discount).sum(axis=1)
+            slope = (-years[active] * cashflows[active] * discount / (1 + r)).sum(axis=1)
+            step = npv / slope
+            rate[active] = np.maximum(rate[active] - step, -0.9999)
+            done[active] = np.abs(step) < tol
+    rate[~(solvable & done) | ~np.isfinite(rate)] = np.nan
+    return rate
+
+
+def compute_flow_returns(df):
+    """
+    由报表历史（组合名称、日期、总资产（万元）、新增金额（万元）、减少金额（万元））计算每个组合
+    在历史区间内的时间加权收益和资金加权收益，返回每个组合一行的 DataFrame。
+    约定：当天的转入转出已包含在当天的总资产中；区间第一天的总资产视为期初投入。
+    """
+    panel = _flow_panel(df)
+    assets = panel["总资产（万元）"]
+    names = assets.columns
+    dates = assets.index.to_numpy()
+    v = assets.to_numpy()
+    f = panel["净转入"].reindex(columns=names).fillna(0).to_numpy()
+
+    valid = ~np.isnan(v)
+    has_data = valid.any(axis=0)
+    first = np.where(has_data, np.argmax(valid, axis=0), 0)
+    last = np.where(has_data, len(v) - 1 - np.argmax(valid[::-1], axis=0), 0)
+    rows = np.arange(len(v))[:, None]
+    in_range = (rows >= first) & (rows <= last)
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        # === 时间加权：每日收益 = (当日资产 - 当日净转入) / 前一日资产 - 1，区间内缺失的日期沿用前一日资产 ===
+        v_filled = assets.ffill(limit_area="inside").to_numpy()
+        daily = (v_filled[1:] - f[1:]) / v_filled[:-1] - 1
+        daily[~in_range[1:] | ~in_range[:-1]] = np.nan
+        twr = np.where(last > first, np.nanprod(1 + daily, axis=0) - 1, np.nan)
+
+        # === 资金加权：期初资产和每日净转入为投入（负），期末资产为回收（正）===
+        cols = np.arange(len(names))
+        cashflows = np.where(in_range, -f, 0.0)
+        cashflows[first, cols] = -v_filled[first, cols]
+        cashflows[last, cols] += v_filled[last, cols]
+        years = (dates[:, None] - dates[first][None, :]) / np.timedelta64(1, "D") / 365.0
+        irr = batch_irr(cashflows.T, np.where(in_range, years, 0.0).T)
+
+    days = (dates[last] - dates[first]) / np.timedelta64(1, "D")
+    result = pd.DataFrame({
+        "组合名称": names,
+        "起始日期": pd.to_datetime(dates[first]),
+        "截止日期": pd.to_datetime(dates[last]),
+        "时间加权收益": twr,
+        "时间加权年化收益": annualize(twr, days, "compound"),
+        "资金加权年化收益": irr,
+    })
+    return result[has_data].reset_index(drop=True)
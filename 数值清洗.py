@@ -0,0 +1,54 @@
+"""
+数值清洗：各脚本共用的“带千分位的文本 → 数值”转换
+
+导出的表格里金额、户数常以 "1,234.56"、"1，234"、"−5"（全角负号）、"12.5%" 等文本出现。这里对每列只做一次向量化处理：
+本来就是数字的单元格直接转换，只有解析失败的文本单元格才去掉千分位（半角/全角逗号）、空白并统一负号后再解析，
+以百分号（半角/全角）结尾的按百分数换算（"12.5%" → 0.125，与 Excel 中百分比单元格的取值一致）。
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# 去掉千分位逗号（半角/全角）和空白；全角负号、全角减号、全角百分号统一为半角
+_CLEAN_TABLE = str.maketrans({",": None, "，": None, " ": None, "　": None, "−": "-", "－": "-", "％": "%"})
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def _downcast(out: pd.Series, downcast):
+    if downcast == "integer":
+        values = out.to_numpy()
+        if (len(values) and not out.isna().any()
+                and np.all(np.mod(values, 1) == 0)
+                and values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+            return out.astype(np.int32)
+        return out
+    if downcast == "float":
+        return out.astype(np.float32)
+    return out
+
+
+def parse_numeric(series: pd.Series, downcast=None) -> pd.Series:
+    """
+    把一列转为数值，无法解析的记为 NaN；"12.5%" 这样的百分数文本换算为 0.125。
+    downcast="integer"：全部为整数、无缺失且在 int32 范围内时转为 int32（户数等计数列）；
+    downcast="float"：转为 float32，只用于对精度不敏感的列（金额列保持 float64，避免分位误差）。
+    """
+    if is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype):
+        return _downcast(series, downcast)
+
+    out = pd.to_numeric(series, errors="coerce")
+    pending = out.isna() & series.notna()
+    if pending.any():
+        text = series[pending].astype(str).str.translate(_CLEAN_TABLE)
+        percent = text.str.endswith("%").to_numpy(dtype=bool)
+        values = pd.to_numeric(text.str.removesuffix("%"), errors="coerce").astype("float64")
+        values[percent] /= 100
+        out = out.astype("float64")
+        out[pending] = values
+    return _downcast(out, downcast)
+
+
+def parse_number(value):
+    """单个单元格的数值转换，规则与 parse_numeric 相同"""
+    return parse_numeric(pd.Series([value], dtype=object)).iloc[0]
@@ -0,0 +1,310 @@
+"""
+本地数据存储（SQLite，默认保存在脚本目录下的 基金数据.db）
+
+净值历史：按 组合代码 记录已入库的最新净值日期（水位线），每次只写入水位线之后的新行，
+日常运行的入库量只与新增数据有关；库中保留完整净值历史，供收益率计算和绘图使用。
+
+报表历史：每天的基金数据统计结果（表格4）按 (组合名称, 日期) 追加入库，绘图时按日期范围一次查询取出
+所有组合的历史，替代手工维护的表格5。
+
+资金历史：每天的签解约客户数和资金增减汇总结果（表格3）按 (组合名称, 日期) 入库，供 区间资金汇总.py
+计算本周、本月、本季等任意区间的合计。
+"""
+import os
+import sqlite3
+
+import pandas as pd
+
+from 表格结构 import apply_schema
+from 面板数据 import compact_panel
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "基金数据.db")
+
+NAV_COLUMNS = ["组合代码", "组合名称", "策略名称", "净值日期", "组合净值", "基准净值"]
+
+# 与表格结果汇总输出的列一致
+REPORT_COLUMNS = [
+    "组合名称", "日期", "组合净值", "基准净值", "组合累计收益*",
+    "基准累计收益", "超额收益", "组合年化收益", "基准年化收益",
+    "签约客户数", "解约客户数", "累计客户数",
+    "新增金额（万元）", "减少金额（万元）",
+    "总资产（万元）", "总份额（万份）", "运行天数", "起始日期",
+]
+
+# 与签解约客户数和资金增减计算结果（表格3）的列一致
+FLOW_COLUMNS = ["签约客户数(户)", "转入资金(元)", "解约客户数(户)", "转出资金(元)"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nav_history (
+    "组合代码" TEXT NOT NULL,
+    "组合名称" TEXT,
+    "策略名称" TEXT,
+    "净值日期" TEXT NOT NULL,
+    "组合净值" REAL,
+    "基准净值" REAL,
+    PRIMARY KEY ("组合代码", "净值日期")
+);
+CREATE INDEX IF NOT EXISTS idx_nav_date ON nav_history ("净值日期");
+CREATE TABLE IF NOT EXISTS nav_watermark (
+    "组合代码" TEXT PRIMARY KEY,
+    "最新净值日期" TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_history (
+    "组合名称" TEXT NOT NULL,
+    "日期" TEXT NOT NULL,
+    "组合净值" REAL,
+    "基准净值" REAL,
+    "组合累计收益*" REAL,
+    "基准累计收益" REAL,
+    "超额收益" REAL,
+    "组合年化收益" REAL,
+    "基准年化收益" REAL,
+    "签约客户数" REAL,
+    "解约客户数" REAL,
+    "累计客户数" REAL,
+    "新增金额（万元）" REAL,
+    "减少金额（万元）" REAL,
+    "总资产（万元）" REAL,
+    "总份额（万份）" REAL,
+    "运行天数" REAL,
+    "起始日期" TEXT,
+    PRIMARY KEY ("组合名称", "日期")
+);
+CREATE INDEX IF NOT EXISTS idx_report_date ON report_history ("日期");
+CREATE TABLE IF NOT EXISTS flow_history (
+    "组合名称" TEXT NOT NULL,
+    "日期" TEXT NOT NULL,
+    "签约客户数(户)" REAL,
+    "转入资金(元)" REAL,
+    "解约客户数(户)" REAL,
+    "转出资金(元)" REAL,
+    PRIMARY KEY ("组合名称", "日期")
+);
+"""
+
+
+def _quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def connect(db_path=None):
+    """打开（必要时创建）数据库并建表"""
+    conn = sqlite3.connect(db_path or DEFAULT_DB)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _normalize_nav(df):
+    """统一净值数据的列和类型：组合代码补足4位，日期转为 yyyy-mm-dd 文本"""
+    df = apply_schema(df, "净值", source="净值数据")[NAV_COLUMNS].dropna(subset=["组合代码", "净值日期"])
+    df["净值日期"] = df["净值日期"].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def ingest_nav(df, db_path=None, since=None):
+    """
+    把净值数据中水位线之后的新行写入净值历史，返回写入的行数。
+    since（如 "2025-08-01"）：数据修正后需要重灌时使用，该日期及之后的行无论水位线如何都重新写入。
+    """
+    df = _normalize_nav(df)
+    conn = connect(db_path)
+    try:
+        watermark = dict(conn.execute('SELECT "组合代码", "最新净值日期" FROM nav_watermark').fetchall())
+        last = df["组合代码"].map(watermark).fillna("").astype(str)
+        mask = df["净值日期"] > last
+        if since is not None:
+            mask |= df["净值日期"] >= pd.Timestamp(since).strftime("%Y-%m-%d")
+        new_rows = df[mask]
+        if new_rows.empty:
+            return 0
+
+        cols = ", ".join(_quote(c) for c in NAV_COLUMNS)
+        marks = ", ".join("?" for _ in NAV_COLUMNS)
+        latest = new_rows.groupby("组合代码")["净值日期"].max()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO nav_history ({cols}) VALUES ({marks})",
+                new_rows.astype(object).where(new_rows.notna(), None).itertuples(index=False, name=None),
+            )
+            conn.executemany(
+                'INSERT INTO nav_watermark ("组合代码", "最新净值日期") VALUES (?, ?) '
+                'ON CONFLICT("组合代码") DO UPDATE SET "最新净值日期" = '
+                'MAX("最新净值日期", excluded."最新净值日期")',
+                latest.items(),
+            )
+        return len(new_rows)
+    finally:
+        conn.close()
+
+
+def load_nav_history(db_path=None, start=None, end=None, codes=None):
+    """按日期范围（含首尾）和组合代码读取净值历史：净值日期为 datetime64，组合代码、名称、策略为 category"""
+    where, params = [], []
+    if start is not None:
+        where.append('"净值日期" >= ?')
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append('"净值日期" <= ?')
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    if codes is not None:
+        codes = [str(c).zfill(4) for c in codes]
+        where.append(f'"组合代码" IN ({", ".join("?" for _ in codes)})')
+        params.extend(codes)
+    sql = "SELECT * FROM nav_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += ' ORDER BY "净值日期", "组合代码"'
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return compact_panel(df)
+
+
+def load_latest_nav(db_path=None, n_dates=2):
+    """读取库中最新 n_dates 个净值日期的全部数据（日报只需要 t 日和 t-1 日）"""
+    conn = connect(db_path)
+    try:
+        dates = [r[0] for r in conn.execute(
+            'SELECT DISTINCT "净值日期" FROM nav_history ORDER BY "净值日期" DESC LIMIT ?', (n_dates,))]
+    finally:
+        conn.close()
+    if not dates:
+        return pd.DataFrame(columns=NAV_COLUMNS)
+    return load_nav_history(db_path, start=min(dates), end=max(dates))
+
+
+def save_report_history(df, db_path=None):
+    """
+    把基金数据统计结果（列同 REPORT_COLUMNS）按 (组合名称, 日期) 写入报表历史，返回写入的行数。
+    同一组合同一天已存在时只用非空值覆盖：例如 t-1 日“货币增强”行的资金、客户数列为空，不会冲掉前一天已入库的数值。
+    """
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+    missing = [c for c in ["组合名称", "日期"] if c not in df.columns]
+    if missing:
+        raise ValueError(f"报表数据缺少列：{missing}")
+    # 其余列缺失时按空值入库（例如表格5中只保留了绘图用到的列）
+    df = df.reindex(columns=REPORT_COLUMNS).dropna(subset=["组合名称", "日期"])
+    df["组合名称"] = df["组合名称"].astype(str).str.strip()
+    for col in ["日期", "起始日期"]:
+        df[col] = pd.to_datetime(df[col]).dt.strftime("%Y-%m-%d")
+    if df.empty:
+        return 0
+
+    cols = ", ".join(_quote(c) for c in REPORT_COLUMNS)
+    marks = ", ".join("?" for _ in REPORT_COLUMNS)
+    updates = ", ".join(
+        f"{_quote(c)} = COALESCE(excluded.{_quote(c)}, {_quote(c)})"
+        for c in REPORT_COLUMNS if c not in ("组合名称", "日期")
+    )
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT INTO report_history ({cols}) VALUES ({marks}) "
+                f'ON CONFLICT("组合名称", "日期") DO UPDATE SET {updates}',
+                df.astype(object).where(df.notna(), None).itertuples(index=False, name=None),
+            )
+    finally:
+        conn.close()
+    return len(df)
+
+
+def load_report_history(db_path=None, start=None, end=None, names=None):
+    """按日期范围（含首尾）和组合名称一次查询报表历史，日期列为 datetime64、组合名称为 category，按组合名称、日期排序"""
+    where, params = [], []
+    if start is not None:
+        where.append('"日期" >= ?')
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append('"日期" <= ?')
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    if names is not None:
+        names = list(names)
+        where.append(f'"组合名称" IN ({", ".join("?" for _ in names)})')
+        params.extend(names)
+    sql = "SELECT * FROM report_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += ' ORDER BY "组合名称", "日期"'
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return compact_panel(df)
+
+
+def save_flow_history(df, date, db_path=None):
+    """
+    把某一天的签解约客户数和资金增减汇总结果（列含 组合名称 和 FLOW_COLUMNS）写入资金历史，返回写入的行数。
+    同一组合同一天重复写入时以最新一次为准（重跑当天报表不会重复计入）。
+    组合名称统一为不带“组合”后缀的写法（与表格3、组合配置一致），“股债平衡组合”和“股债平衡”记为同一组合。
+    """
+    df = df.reindex(columns=["组合名称"] + FLOW_COLUMNS).dropna(subset=["组合名称"])
+    df.insert(1, "日期", pd.Timestamp(date).strftime("%Y-%m-%d"))
+    df["组合名称"] = df["组合名称"].astype(str).str.strip().str.replace(r"组合$", "", regex=True)
+    if df.empty:
+        return 0
+
+    cols = ", ".join(_quote(c) for c in df.columns)
+    marks = ", ".join("?" for _ in df.columns)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO flow_history ({cols}) VALUES ({marks})",
+                df.astype(object).where(df.notna(), None).itertuples(index=False, name=None),
+            )
+    finally:
+        conn.close()
+    return len(df)
+
+
+def seed_flow_history(db_path=None):
+    """
+    用报表历史中的签约/解约客户数、新增/减少金额（万元 → 元）补齐资金历史中还没有的 (组合名称, 日期)，
+    返回补入的行数。启用资金历史之前积累的报表历史（如导入的表格5）由此也能参与区间汇总。
+    报表历史中的组合名称带“组合”后缀，补入时去掉，与 save_flow_history 写入的名称一致。
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            cur = conn.execute(
+                'INSERT OR IGNORE INTO flow_history '
+                f'("组合名称", "日期", {", ".join(_quote(c) for c in FLOW_COLUMNS)}) '
+                'SELECT CASE WHEN "组合名称" LIKE \'%组合\' THEN substr("组合名称", 1, length("组合名称") - 2) '
+                'ELSE "组合名称" END, "日期", "签约客户数", ROUND("新增金额（万元）" * 10000, 2), '
+                '"解约客户数", ROUND("减少金额（万元）" * 10000, 2) FROM report_history '
+                'WHERE COALESCE("签约客户数", "解约客户数", "新增金额（万元）", "减少金额（万元）") IS NOT NULL'
+            )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def load_flow_history(db_path=None, start=None, end=None):
+    """按日期范围（含首尾）读取资金历史，日期列为 datetime64，按日期、组合名称排序"""
+    where, params = [], []
+    if start is not None:
+        where.append('"日期" >= ?')
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append('"日期" <= ?')
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    sql = "SELECT * FROM flow_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += ' ORDER BY "日期", "组合名称"'
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    df["日期"] = pd.to_datetime(df["日期"])
+    return df
@@ -0,0 +1,130 @@
+"""
+流式读取：逐块读取很大的明细表格，边读边按组合累加，内存占用与文件大小无关
+
+银行改为发送客户级明细后，总资产和客户数、签解约和资金增减表格可达数百万行，整表读入内存只为按组合名称求和。
+这里 xlsx 用 openpyxl 只读模式逐行读取、csv 用 pd.read_csv 分块读取，每次只保留一块（默认 10 万行）：
+
+- iter_chunks：逐块返回 DataFrame，行索引为整张表中的行号（与一次读入时一致），标记行的单元格地址不变
+- GroupSums：按组合名称累加各列之和，只保存各组合的合计
+- use_streaming：是否改用流式读取。csv 文件总是流式读取；xlsx 由环境变量 FUND_STREAM 决定
+  （1 总是、0 从不，默认文件超过 FUND_STREAM_MB（默认 64）MB 时）；FUND_STREAM_ROWS 为每块行数
+
+只读表头（表格结构.read_header）时不导入 pandas。
+"""
+import codecs
+import csv
+import os
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_STREAM_MB = 64
+
+
+def use_streaming(path, force=None) -> bool:
+    """是否流式读取 path；force 为 True / False 时按其决定（csv 文件总是流式读取）"""
+    if os.path.splitext(str(path))[1].lower() == ".csv":
+        return True
+    if force is not None:
+        return bool(force)
+    setting = os.environ.get("FUND_STREAM", "")
+    if setting in ("0", "1"):
+        return setting == "1"
+    limit_mb = float(os.environ.get("FUND_STREAM_MB") or DEFAULT_STREAM_MB)
+    return os.path.getsize(path) >= limit_mb * 1024 * 1024
+
+
+def csv_encoding(path) -> str:
+    """csv 编码：开头 1 MB 能按 UTF-8 解码时为 utf-8-sig，否则按 gb18030（兼容 GBK 导出）"""
+    with open(path, "rb") as f:
+        head = f.read(1 << 20)
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "gb18030"
+
+
+def read_csv_header(path) -> list:
+    with open(path, newline="", encoding=csv_encoding(path)) as f:
+        return [c for c in next(csv.reader(f), []) if c]
+
+
+def _column_names(header):
+    """表头 → 列名，规则与 pd.read_excel 相同：空单元格为 Unnamed: i，重复列名依次加 .1、.2"""
+    names, seen = [], {}
+    for i, c in enumerate(header):
+        name = f"Unnamed: {i}" if c is None or str(c).strip() == "" else c
+        n = seen.get(name, 0)
+        seen[name] = n + 1
+        names.append(name if n == 0 else f"{name}.{n}")
+    return names
+
+
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _xlsx_chunks(path, chunk_rows):
+    import pandas as pd
+    header, buf, start = None, [], 0
+    for row in _xlsx_rows(path):
+        # 与 pd.read_excel 一致：整行为空的行跳过，不计入行号
+        if all(v is None or (isinstance(v, str) and not v.strip()) for v in row):
+            continue
+        if header is None:
+            while row and row[-1] is None:
+                row = row[:-1]
+            header = _column_names(row)
+            continue
+        row = tuple(row[:len(header)]) + (None,) * (len(header) - len(row))
+        buf.append(row)
+        if len(buf) >= chunk_rows:
+            yield pd.DataFrame.from_records(buf, columns=header, index=pd.RangeIndex(start, start + len(buf)))
+            start += len(buf)
+            buf = []
+    if header is not None and (buf or start == 0):
+        yield pd.DataFrame.from_records(buf, columns=header, index=pd.RangeIndex(start, start + len(buf)))
+
+
+def iter_chunks(path, chunk_rows=None):
+    """逐块读取第一个 sheet（或 csv），每块最多 chunk_rows 行；行索引为整张表中的行号（表头下第一行为 0）"""
+    chunk_rows = int(chunk_rows or os.environ.get("FUND_STREAM_ROWS") or DEFAULT_CHUNK_ROWS)
+    if os.path.splitext(str(path))[1].lower() == ".csv":
+        import pandas as pd
+        with pd.read_csv(path, chunksize=chunk_rows, encoding=csv_encoding(path)) as reader:
+            yield from reader
+    else:
+        yield from _xlsx_chunks(path, chunk_rows)
+
+
+class GroupSums:
+    """按 key 列分组累加 columns 各列之和；key 为空的行不计入（与 groupby 一致），结果按 key 排序"""
+
+    def __init__(self, key, columns):
+        self.key, self.columns = key, list(columns)
+        self.total = None
+        self.integer = dict.fromkeys(self.columns, True)
+
+    def add(self, chunk):
+        from pandas.api.types import is_integer_dtype
+        for c in self.columns:
+            self.integer[c] = self.integer[c] and is_integer_dtype(chunk[c].dtype)
+        part = chunk.groupby(self.key, sort=False)[self.columns].sum()
+        self.total = part if self.total is None else self.total.add(part, fill_value=0)
+
+    def result(self):
+        import pandas as pd
+        from 数值清洗 import parse_numeric
+        if self.total is None:
+            return pd.DataFrame(columns=[self.key] + self.columns)
+        out = self.total.sort_index().reset_index()
+        # 各块都是整数的列（户数）合计后仍为整数（与一次读入时相同，在 int32 范围内时为 int32）；
+        # 对齐新组合时 add 会把它们变成浮点数
+        for c in self.columns:
+            if self.integer[c]:
+                out[c] = parse_numeric(out[c].astype("int64"), downcast="integer")
+        return out
@@ -0,0 +1,109 @@
+"""
+组合配置：读取 组合配置.toml 中的组合清单（代码、名称、策略、起始日期、显示顺序、坐标轴参数）
+
+配置文件默认位于脚本目录，可用环境变量 FUND_PORTFOLIO_CONFIG 指定其他路径；文件不存在时清单为空，
+各脚本照旧从起始日期表格、轴参数工作簿读取。解析结果按（路径, 修改时间）缓存，同一进程内只解析一次。
+只有生成表格的函数才导入 pandas，单纯校验配置（基金报表.py check）时不必等待 pandas 加载。
+"""
+import functools
+import os
+import tomllib
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "组合配置.toml")
+
+AXIS_KEYS = ["left_min", "left_max", "left_step", "right_min", "right_max", "right_step"]
+
+
+def config_path():
+    return os.environ.get("FUND_PORTFOLIO_CONFIG") or DEFAULT_CONFIG
+
+
+@functools.lru_cache(maxsize=8)
+def _parse(path, mtime_ns):
+    """解析并校验配置文件，返回组合清单（元组，按书写顺序）"""
+    with open(path, "rb") as f:
+        entries = tomllib.load(f).get("portfolio", [])
+    seen = set()
+    portfolios = []
+    for i, entry in enumerate(entries, start=1):
+        name = str(entry.get("name", "")).strip()
+        if not name:
+            raise ValueError(f"{path} 第 {i} 个组合缺少 name")
+        if name in seen:
+            raise ValueError(f"{path} 中组合『{name}』重复")
+        seen.add(name)
+        item = dict(entry, name=name)
+        if item.get("code") is not None:
+            item["code"] = str(item["code"]).strip().zfill(4)
+        portfolios.append(item)
+    return tuple(portfolios)
+
+
+def load_portfolios(path=None):
+    """返回组合清单（每个组合一个 dict）；配置文件不存在时返回空元组"""
+    path = os.path.abspath(path or config_path())
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return ()
+    return _parse(path, mtime_ns)
+
+
+def portfolio_order(path=None):
+    """组合显示顺序（组合名称列表）"""
+    return [p["name"] for p in load_portfolios(path)]
+
+
+def find_portfolio(key, path=None):
+    """按组合名称或组合代码查找组合，找不到返回 None"""
+    key = str(key).strip()
+    for p in load_portfolios(path):
+        if key == p["name"] or (p.get("code") is not None and key.zfill(4) == p["code"]):
+            return p
+    return None
+
+
+def _combine(df_config, df_workbook, key):
+    """配置中的行优先，表格中只补充配置里没有的组合；配置中没有任何数据时原样返回表格"""
+    import pandas as pd
+    if df_workbook is None:
+        return df_config
+    if df_config.empty:
+        return df_workbook
+    df_workbook = df_workbook.copy()
+    df_workbook.columns = df_workbook.columns.astype(str).str.strip()
+    rest = df_workbook[~df_workbook[key].astype(str).str.strip().isin(df_config[key])]
+    return pd.concat([df_config, rest[df_config.columns]], ignore_index=True)
+
+
+def start_dates_complete(path=None):
+    """配置中的每个组合都填写了起始日期时为 True（此时无需再读取起始日期表格）"""
+    portfolios = load_portfolios(path)
+    return bool(portfolios) and all(p.get("start_date") is not None for p in portfolios)
+
+
+def start_dates_table(df_workbook=None, path=None):
+    """起始日期表（组合名称、起始日期）：配置中填写的优先，其余组合取自起始日期表格 df_workbook"""
+    import pandas as pd
+    rows = [(p["name"], p["start_date"]) for p in load_portfolios(path) if p.get("start_date") is not None]
+    df_config = pd.DataFrame(rows, columns=["组合名称", "起始日期"])
+    df_config["起始日期"] = pd.to_datetime(df_config["起始日期"])
+    df = _combine(df_config, df_workbook, "组合名称")
+    if not df_config.empty:
+        df["起始日期"] = pd.to_datetime(df["起始日期"])
+    return df
+
+
+def axes_complete(path=None):
+    """配置中的每个组合都填写了全部坐标轴参数时为 True（此时无需再选择轴参数工作簿）"""
+    portfolios = load_portfolios(path)
+    return bool(portfolios) and all(all(p.get(k) is not None for k in AXIS_KEYS) for p in portfolios)
+
+
+def axes_table(df_workbook=None, path=None):
+    """坐标轴参数表（组合、left_min…right_step）：配置中填写完整的优先，其余组合取自轴参数表 df_workbook"""
+    import pandas as pd
+    rows = [[p["name"]] + [float(p[k]) for k in AXIS_KEYS]
+            for p in load_portfolios(path) if all(p.get(k) is not None for k in AXIS_KEYS)]
+    df_config = pd.DataFrame(rows, columns=["组合"] + AXIS_KEYS)
+    return _combine(df_config, df_workbook, "组合")
@@ -0,0 +1,340 @@
+"""
+绘图：各组合收益/资产图的统一样式、出图和并行绘图
+
+自动绘图基于3.13版本.py 的文件名带“3.13”，不能被 import；并行绘图时子进程要按模块名找回 _render_job、
+_init_render_worker（Windows、macOS 默认用 spawn 启动子进程，不会继承父进程中按路径加载的模块），
+因此出图相关的函数放在本模块，由绘图脚本、基金报表.py plot 和 性能测试.py 共用。
+"""
+import os, re, math, functools, hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from 表格结构 import SCHEMAS, SchemaError, apply_schema
+from 运行记录 import stage
+
+
+# ========== 全局外观（中文/负号）：matplotlib 在第一次绘图时才导入，只读配置、出错退出时不必等待 ==========
+@functools.lru_cache(maxsize=None)
+def pyplot():
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    mpl.rcParams['font.family'] = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS']
+    mpl.rcParams['axes.unicode_minus'] = False
+    return plt
+
+def choose_uniform_ticks(n_points: int, target_labels: int = 12):
+    """
+    在 0..n_points-1 上挑出 ~target_labels 个等距刻度。
+    - 保证首尾都有
+    - 小样本不会报错
+    - 去重、排序
+    """
+    target_labels = max(3, int(target_labels))
+    if n_points <= target_labels:
+        return np.arange(n_points)
+
+    step = int(np.ceil(n_points / target_labels))
+    pos = np.arange(0, n_points, step)
+
+    # 保证首尾
+    if pos[0] != 0:
+        pos = np.r_[0, pos]
+    if pos[-1] != n_points - 1:
+        pos = np.r_[pos, n_points - 1]
+
+    return np.unique(pos)
+
+# 绘图数据 sheet 用到的列（列名的各种写法见 表格结构.SCHEMAS）
+CHART_COLS = tuple(c.name for c in SCHEMAS["绘图"] if c.name != "日期")
+
+# ========== 绘图参数（与你单张图风格一致）=========
+FIGSIZE = (12, 8)
+XTICK_STEP = 61
+BAR_WIDTH = 0.8
+BOTTOM_SPACE = 0.18
+XTICK_TARGET = 10   # X 轴日期标签数量，想更稀/更密改这个数
+
+# 并行绘图进程数：<=1 时逐张串行绘制；可用环境变量 PLOT_WORKERS 覆盖
+RENDER_WORKERS = int(os.environ.get("PLOT_WORKERS", "1"))
+# 复用同一张图的骨架、只替换数据（默认）；设为 0 时每张图重新创建画布
+REUSE_FIGURE = os.environ.get("PLOT_REUSE_FIGURE", "1") != "0"
+# 每条线 / 每组柱最多画的点数：历史超过该点数时先抽样再绘图（如 1500）；0 为不抽样（默认）
+MAX_POINTS = int(os.environ.get("PLOT_MAX_POINTS", "0"))
+
+def prepare_sheet_data(df: pd.DataFrame, sheet_name: str):
+    """定位必要列（列名解析按 sheet 的列排列缓存）并清洗/排序；缺列或无有效数据时打印原因并返回 None，否则返回 (df, 列名元组)"""
+    # 定位必要列并转换类型；无法识别的日期（备注行等）记为缺失后丢弃
+    try:
+        df = apply_schema(df, "绘图", errors="coerce")
+    except SchemaError as e:
+        print(f"⚠️ 『{sheet_name}』{e}，跳过。")
+        return None
+
+    # 清洗/排序
+    df = df[["日期", *CHART_COLS]].dropna(subset=["日期"]).sort_values("日期").reset_index(drop=True)
+    if len(df) == 0:
+        print(f"⚠️ 『{sheet_name}』无有效数据，跳过。")
+        return None
+    return df, CHART_COLS
+
+# ========== 长历史抽样：点数远多于图上像素时，画出来的样子由少数点决定 ==========
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets：从折线 (x, y) 中挑出 n_out 个最能保持形状的点，返回下标。
+    首尾点总是保留；中间的点均分成 n_out-2 个桶，每桶取与“上一个选中点、下一桶均值点”围成三角形面积最大的点。
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:nxt].mean(), y[hi:nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+def decimate_line(y: np.ndarray, n_out: int, keep=()) -> np.ndarray:
+    """
+    折线抽样，返回保留点的下标（升序）：有效值用 LTTB 挑选，另外保留 keep 中的点（刻度位置）；
+    缺失值处的断线保持原样（保留每段缺失的第一个点及其前后的有效点）。n_out 为 0 时不抽样。
+    """
+    n = len(y)
+    if not n_out or n <= n_out:
+        return np.arange(n)
+    finite = np.isfinite(y)
+    idx = np.flatnonzero(finite)
+    sel = idx[lttb_indices(idx.astype(float), y[idx], n_out)]
+    if not finite.all():
+        gap = ~finite
+        prev_gap = np.r_[False, gap[:-1]]
+        next_gap = np.r_[gap[1:], False]
+        edges = (gap & ~prev_gap) | (finite & (prev_gap | next_gap))
+        sel = np.union1d(sel, np.flatnonzero(edges))
+    return np.union1d(sel, np.asarray(keep, dtype=int))
+
+def bucket_bars(heights: np.ndarray, n_out: int):
+    """
+    柱子分桶：首尾两天各自保留，中间相邻的若干天合成一根覆盖整个桶的柱子，高度取桶内最大值
+    （从 0 起画的柱子，外轮廓只由最大值决定，最小值被相邻的柱子盖住）。
+    天数远多于像素时逐日的柱子本来就连成一片，相邻的桶首尾相接，避免像素对齐后出现细缝。
+    返回 (左边界, 高度, 宽度)；n_out 为 0 或不少于天数时每天一根柱子。
+    """
+    n = len(heights)
+    x = np.arange(n)
+    if not n_out or n <= n_out or n_out < 3:
+        return x - BAR_WIDTH / 2, heights, np.full(n, BAR_WIDTH)
+    starts = np.linspace(1, n - 1, n_out - 1).astype(int)[:-1]
+    ends = np.r_[starts[1:], n - 1]
+    mid = np.fmax.reduceat(heights[1:n - 1], starts - 1)
+    left = np.r_[0, starts, n - 1] - BAR_WIDTH / 2
+    width = np.r_[BAR_WIDTH, ends - starts, BAR_WIDTH]
+    return left, np.r_[heights[0], mid, heights[-1]], width
+
+class ChartTemplate:
+    """
+    图的骨架（画布、双轴、柱、线、图例、单位文字）只创建一次；每个组合只替换柱高、线数据、坐标轴范围、刻度和标题。
+    tight_layout 只在刻度标签、标题尺寸变化时重新计算（每次都从初始边距开始算，结果与逐张新建画布一致）。
+    """
+    def __init__(self):
+        plt = pyplot()
+        fig, ax1 = plt.subplots(figsize=FIGSIZE)
+        fig.subplots_adjust(bottom=BOTTOM_SPACE)
+        self.subplotpars = {k: getattr(fig.subplotpars, k) for k in ("left", "right", "top", "bottom")}
+        ax1.yaxis.set_major_formatter(lambda v, pos: f"{v*100:.0f}%")
+
+        # 右轴
+        ax2 = ax1.twinx()
+        ax1.set_zorder(3); ax2.set_zorder(2); ax1.patch.set_alpha(0)
+        self.bars = list(ax2.bar([0], [0], color="lightgray", label="总资产（万元）",
+                                 width=BAR_WIDTH, align="center", zorder=1).patches)
+        self.line_shares, = ax2.plot([0], [0], color="gold", linewidth=1.2, alpha=0.8,
+                                     label="总份额（万份）", zorder=2)
+
+        # 右轴单位（放在坐标轴内部右上角，避免被 tight_layout 裁切）
+        ax2.text(0.995, 1.01, "万元",
+                 transform=ax2.transAxes,
+                 ha="right", va="bottom",
+                 fontsize=10, color="#666")
+
+        # 左轴三条线
+        self.line_combo, = ax1.plot([0], [0], label="组合累计收益", color="#1f77b4", linewidth=1.6, zorder=5)
+        self.line_bench, = ax1.plot([0], [0], label="基准累计收益", color="#ff7f0e", linewidth=1.6, zorder=6)
+        self.line_excess, = ax1.plot([0], [0], label="超额收益",   color="#d62728", linewidth=1.6, zorder=5)
+
+        # 字号
+        ax1.tick_params(axis='x', labelsize=8)
+        ax1.tick_params(axis='y', labelsize=8)
+        ax2.tick_params(axis='y', labelsize=8)
+
+        # 图例（底部）
+        lines1, labels1 = ax1.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax1.legend(lines1 + lines2, labels1 + labels2,
+                   loc='upper center', bbox_to_anchor=(0.5, -0.08),
+                   ncol=5, frameon=False, prop={'size':10})
+
+        self.fig, self.ax1, self.ax2 = fig, ax1, ax2
+        self.layout_key = None
+
+    def _set_bars(self, left, heights, widths):
+        """复用已有的柱子，只改位置、宽度和高度；柱子变多时补建，变少时移除多余的柱子"""
+        for rect, l, h, w in zip(self.bars, left, heights, widths):
+            rect.set_x(l)
+            rect.set_width(w)
+            rect.set_height(h)
+        n_old = len(self.bars)
+        if len(left) > n_old:
+            extra = self.ax2.bar(left[n_old:], heights[n_old:], color="lightgray",
+                                 width=widths[n_old:], align="edge", zorder=1)
+            self.bars.extend(extra.patches)
+        else:
+            for rect in self.bars[len(left):]:
+                rect.remove()
+            del self.bars[len(left):]
+
+    def _set_line(self, line, x, y, max_points, keep):
+        """更新一条线的数据；max_points 不为 0 时先抽样（保留首尾点和刻度位置上的点）"""
+        sel = decimate_line(y, max_points, keep)
+        if len(sel) < len(y):
+            x, y = x[sel], y[sel]
+        line.set_data(x, y)
+
+    def _tick_labels(self, axis):
+        """当前视图范围内显示的刻度标签；数字统一替换为 0（常用字体的数字等宽，宽度只取决于位数和符号）"""
+        lo, hi = sorted(axis.get_view_interval())
+        tol = (hi - lo) * 1e-10
+        locs = [v for v in axis.get_majorticklocs() if lo - tol <= v <= hi + tol]
+        formatter = axis.get_major_formatter()
+        labels = formatter.format_ticks(locs)
+        offset = formatter.get_offset() if hasattr(formatter, "get_offset") else ""
+        return frozenset(re.sub(r"\d", "0", str(t)) for t in labels), re.sub(r"\d", "0", offset)
+
+    def _layout_key(self, x_labels):
+        """决定 tight_layout 结果的因素：左右轴刻度标签、首尾日期标签（会超出坐标轴左右边缘）、标题高度"""
+        first, last = (re.sub(r"\d", "0", x_labels[i]) for i in (0, -1))
+        return (self._tick_labels(self.ax1.yaxis), self._tick_labels(self.ax2.yaxis), first, last,
+                round(self.ax1.title.get_window_extent().height, 2))
+
+    def update(self, title: str, df: pd.DataFrame, cols: tuple, row: dict):
+        """换成一个组合的数据；row 为该组合的轴参数（left_min/.../right_step）"""
+        col_combo, col_bench, col_excess, col_assets, col_shares = cols
+        ax1, ax2 = self.ax1, self.ax2
+        N = len(df)
+        x = np.arange(N)
+        # X 轴刻度：等量化抽样，自动适配长短（抽样时刻度位置上的点总是保留）
+        tick_pos = choose_uniform_ticks(N, target_labels=XTICK_TARGET)
+        max_points = MAX_POINTS if 0 < MAX_POINTS < N else 0
+
+        # 左轴（收益）范围与刻度（来自轴参数；缺失则用数据兜底）
+        lmin, lmax, lstep = row["left_min"], row["left_max"], row["left_step"]
+        if pd.isna(lmin) or pd.isna(lmax) or pd.isna(lstep):
+            from matplotlib.ticker import AutoLocator
+            vmin = np.nanmin([df[col_combo].min(), df[col_bench].min(), df[col_excess].min()])
+            vmax = np.nanmax([df[col_combo].max(), df[col_bench].max(), df[col_excess].max()])
+            pad = 0.01
+            ax1.set_ylim(vmin - pad, vmax + pad)
+            ax1.yaxis.set_major_locator(AutoLocator())
+        else:
+            lmin, lmax, lstep = float(lmin), float(lmax), float(lstep)
+            ax1.set_ylim(lmin, lmax)
+            ax1.set_yticks(np.arange(lmin, lmax + 1e-12, lstep))
+
+        # 右轴
+        self._set_bars(*bucket_bars(df[col_assets].to_numpy(dtype=float), max_points))
+        self._set_line(self.line_shares, x, df[col_shares].to_numpy(dtype=float), max_points, tick_pos)
+
+        rmin = 0.0 if pd.isna(row["right_min"]) else float(row["right_min"])
+        rstep= 1000.0 if pd.isna(row["right_step"]) else float(row["right_step"])
+        if pd.isna(row["right_max"]):
+            rmax_data = float(np.nanmax([df[col_assets].max(), df[col_shares].max(), rstep]))
+            rmax = math.ceil(rmax_data / rstep) * rstep
+        else:
+            rmax = float(row["right_max"])
+        ax2.set_ylim(rmin, rmax)
+        ax2.set_yticks(np.arange(rmin, rmax + 1e-9, rstep))
+
+        # 左轴三条线
+        self._set_line(self.line_combo, x, df[col_combo].to_numpy(dtype=float), max_points, tick_pos)
+        self._set_line(self.line_bench, x, df[col_bench].to_numpy(dtype=float), max_points, tick_pos)
+        self._set_line(self.line_excess, x, df[col_excess].to_numpy(dtype=float), max_points, tick_pos)
+
+        # X 轴刻度
+        x_labels = df["日期"].dt.strftime("%Y/%m/%d").iloc[tick_pos].tolist()
+        ax1.set_xticks(tick_pos)
+        ax1.set_xticklabels(x_labels, rotation=0, ha='center')
+        ax1.set_xlim(-0.5, N - 0.5)
+
+        # 标题/布局/窗口名：布局因素不变时沿用上一张图算好的边距
+        ax1.set_title(title)
+        key = self._layout_key(x_labels)
+        if key != self.layout_key:
+            self.fig.subplots_adjust(**self.subplotpars)
+            self.fig.tight_layout()
+            self.layout_key = key
+        try:
+            self.fig.canvas.manager.set_window_title(title)
+        except Exception:
+            pass
+
+    def close(self):
+        pyplot().close(self.fig)
+
+@functools.lru_cache(maxsize=None)
+def chart_template() -> ChartTemplate:
+    """本进程共用的图模板（并行绘图时每个子进程各有一个）"""
+    return ChartTemplate()
+
+def render_chart(title: str, df: pd.DataFrame, cols: tuple, row: dict, out_png) -> str:
+    """按统一样式绘制单个组合的图并保存为 PNG；row 为该组合的轴参数（left_min/.../right_step）"""
+    template = chart_template() if REUSE_FIGURE else ChartTemplate()
+    template.update(title, df, cols, row)
+
+    # 保存
+    with stage(f"保存-{title}"):
+        template.fig.savefig(out_png, dpi=150)
+    if not REUSE_FIGURE:
+        template.close()
+    return str(out_png)
+
+def _init_render_worker():
+    """子进程只负责出图，统一使用无界面的 Agg 后端"""
+    pyplot().switch_backend("Agg")
+
+def _render_job(job):
+    with stage(f"绘图-{job[0]}", rows_in=job[1]):
+        return render_chart(*job)
+
+def render_charts(jobs: list, workers: int = RENDER_WORKERS):
+    """
+    批量出图。jobs 为 (title, df, cols, row, out_png) 列表。
+    workers<=1 时在当前进程逐张绘制；否则分发到进程池并行绘制，输出与串行结果逐字节一致。
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            print(f"✅ 已保存：{_render_job(job)}")
+        return
+    with stage(f"绘图-并行{workers}进程", rows_in=len(jobs)), \
+            ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_render_worker) as pool:
+        for out_png in pool.map(_render_job, jobs):
+            print(f"✅ 已保存：{out_png}")
+
+# ========== 绘图缓存用到的样式摘要 ==========
+@functools.lru_cache(maxsize=None)
+def style_digest() -> str:
+    """影响出图的样式：本模块源码（颜色、线宽、图例等）、绘图参数、抽样点数和 matplotlib 版本（不导入 matplotlib）"""
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        mpl_version = version("matplotlib")
+    except PackageNotFoundError:
+        mpl_version = ""
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    h.update(repr((FIGSIZE, XTICK_STEP, XTICK_TARGET, BAR_WIDTH, BOTTOM_SPACE, MAX_POINTS, mpl_version)).encode())
+    return h.hexdigest()
@@ -0,0 +1,66 @@
+"""
+各脚本共用的表格小工具
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+from pandas.io.parsers import TextParser
+
+from 读取缓存 import read_excel_cached
+
+# 标记行（客户小计、客户去重等）通常写在这些列里，优先查找
+LABEL_COLUMNS = ["组合名称", "组合", "机构名称", "机构", "客户类型", "类型"]
+
+
+def _text_mask(s: pd.Series, marker: str, exact: bool) -> np.ndarray:
+    """单列文本匹配；列中混有数字等非文本值时只看文本单元格，不把整列转成字符串"""
+    try:
+        text = s.str
+    except AttributeError:
+        text = s.where(s.map(lambda v: isinstance(v, str))).str
+    if exact:
+        mask = text.strip() == marker
+    else:
+        mask = text.contains(marker, regex=False)
+    return mask.fillna(False).to_numpy(dtype=bool)
+
+
+def find_marker_row(df: pd.DataFrame, marker: str, columns=None, exact: bool = False):
+    """
+    返回第一个含有 marker 文本的行的索引标签，找不到返回 None。
+    - columns：只在这些列中查找；默认在所有文本列中查找，LABEL_COLUMNS 中的列优先
+    - exact=True：单元格去空格后与 marker 完全相等才算命中
+    数值列、日期列不可能含文本，直接跳过；某列命中后，后续列只需在命中行之前查找。
+    """
+    names = [str(c) for c in df.columns]
+    if columns is not None:
+        order = [i for c in columns for i, n in enumerate(names) if n == c]
+    else:
+        first = [i for c in LABEL_COLUMNS for i, n in enumerate(names) if n == c]
+        order = first + [i for i in range(len(names)) if i not in first]
+
+    hit = None
+    for i in order:
+        s = df.iloc[:hit, i] if hit is not None else df.iloc[:, i]
+        if not (is_object_dtype(s.dtype) or is_string_dtype(s.dtype)):
+            continue
+        found = np.flatnonzero(_text_mask(s, marker, exact))
+        if found.size:
+            hit = int(found[0])
+            if hit == 0:
+                break
+    return None if hit is None else df.index[hit]
+
+
+def load_workbook_sheets(xls_path: str) -> dict:
+    """整个工作簿只解析一次：返回 {sheet名: 不设表头的原始表格}，各 sheet 的数据和轴参数表都从这里取"""
+    return read_excel_cached(xls_path, sheet_name=None, header=None)
+
+
+def sheet_table(raw: pd.DataFrame, skiprows: int = 0) -> pd.DataFrame:
+    """从原始表格取出“跳过 skiprows 行、下一行为表头”的数据，结果与 pd.read_excel(..., skiprows=skiprows) 一致"""
+    if len(raw) <= skiprows:
+        return pd.DataFrame()
+    # 与 read_excel 内部一致：空单元格记为 ""，再交给同一个解析器做表头和类型推断
+    rows = raw.astype(object).where(raw.notna(), "").values.tolist()
+    return TextParser(rows, header=0, skiprows=skiprows).read()
@@ -0,0 +1,182 @@
+"""
+表格结构：各类输入表格的列定义（统一列名、其他写法、类型），读取后统一校验、改名、转换类型
+
+- 组合净值查询、总资产和客户数查询、签解约和资金增减查询、组合起始日期、轴参数表、绘图数据 sheet 各有一份列定义；
+- 列名比较时忽略空格、大小写和全角/半角括号，先找完全一致的写法，再找以某文字开头、再找包含某文字的列；
+- 同一种列名排列（同一导出格式）只解析一次，结果按（表格类型, 列名）缓存，14 个 sheet 或每天的新导出都直接复用；
+- 金额列写明的单位与要求不符（如把“总资产(万元)”当作总资产(元)）时同样报错，不会差出 1 万倍；
+- 缺少必要列时抛出 SchemaError，一键生成报表在读取数据、计算之前只读表头就能发现。
+
+只解析表头的函数不导入 pandas，基金报表.py check 校验输入文件时启动仍然很快。
+"""
+import functools
+import os
+from typing import NamedTuple
+
+
+class SchemaError(ValueError):
+    """输入表格缺少必要列或某列内容无法按类型识别"""
+
+
+class Column(NamedTuple):
+    name: str                 # 统一后的列名（各脚本、输出表格使用的列名）
+    aliases: tuple = ()       # 其他写法
+    prefixes: tuple = ()      # 以这些文字开头的列也算，如“组合累计收益(%)”
+    contains: tuple = ()      # 包含这些文字的列也算，如“客户数(户)”
+    dtype: str = "text"       # text / key（category 键列）/ code（4位组合代码，category）/ number / count（户数）/ date
+    required: bool = True
+    unit: str = ""            # 金额单位，如“元”：找到的列名写明了其他单位（如“总资产(万元)”）时报错，不按此列读取
+
+
+SCHEMAS = {
+    "净值": (
+        Column("组合代码", dtype="code"),
+        Column("组合名称", dtype="key"),
+        Column("策略名称", dtype="key"),
+        Column("净值日期", dtype="date"),
+        Column("组合净值", dtype="number"),
+        Column("基准净值", dtype="number"),
+    ),
+    "资产": (
+        Column("组合名称"),
+        Column("客户数", contains=("客户数",), dtype="count"),
+        Column("总资产(元)", aliases=("总资产",), contains=("总资产",), dtype="number", unit="元"),
+    ),
+    "资金": (
+        Column("组合名称"),
+        Column("签约客户数(户)", aliases=("签约客户数",), dtype="count"),
+        Column("转入资金(元)", aliases=("转入资金",), dtype="number"),
+        Column("解约客户数(户)", aliases=("解约客户数",), dtype="count"),
+        Column("转出资金(元)", aliases=("转出资金",), dtype="number"),
+    ),
+    "起始日期": (
+        Column("组合名称"),
+        Column("起始日期", dtype="date"),
+    ),
+    "轴参数": (
+        Column("组合", aliases=("组合名称", "组合名", "名称", "sheet")),
+        Column("left_min", aliases=("leftmin",), dtype="number"),
+        Column("left_max", aliases=("leftmax",), dtype="number"),
+        Column("left_step", aliases=("leftstep", "leftste", "left_ste"), dtype="number"),
+        Column("right_min", aliases=("rightmin",), dtype="number"),
+        Column("right_max", aliases=("rightmax",), dtype="number"),
+        Column("right_step", aliases=("rightstep",), dtype="number"),
+    ),
+    "绘图": (
+        Column("日期", dtype="date"),
+        Column("组合累计收益", prefixes=("组合累计收益",), dtype="number"),
+        Column("基准累计收益", prefixes=("基准累计收益",), dtype="number"),
+        Column("超额收益", prefixes=("超额收益",), dtype="number"),
+        Column("总资产", contains=("总资产",), dtype="number"),
+        Column("总份额", contains=("总份额",), dtype="number"),
+    ),
+}
+
+# 列名中可能写明的金额单位（较长的在前，“万元”不会被当作“元”）
+_UNITS = ("亿元", "万元", "千元", "元")
+
+# 列名比较前统一：去掉空格 / 全角空格，全角括号、负号改为半角
+_NORM_TABLE = str.maketrans({" ": None, "　": None, "（": "(", "）": ")", "−": "-"})
+
+
+def normalize(name) -> str:
+    return str(name).translate(_NORM_TABLE).lower()
+
+
+@functools.lru_cache(maxsize=256)
+def resolve_columns(schema: str, columns: tuple) -> tuple:
+    """
+    把表格的实际列名对应到 schema 中的统一列名，返回 ((统一列名, 实际列名), ...)；可选列找不到时不出现在结果中。
+    缺少必要列时抛出 SchemaError。同一 (schema, 列名) 只解析一次。
+    """
+    norm = [normalize(c) for c in columns]
+    found, missing, used = [], [], set()
+    for col in SCHEMAS[schema]:
+        names = {normalize(col.name)} | {normalize(a) for a in col.aliases}
+        rules = (
+            lambda n: n in names,
+            lambda n: any(n.startswith(normalize(p)) for p in col.prefixes),
+            lambda n: any(normalize(s) in n for s in col.contains),
+        )
+        hit = next((i for rule in rules for i, n in enumerate(norm) if i not in used and rule(n)), None)
+        if hit is None:
+            if col.required:
+                missing.append(col.name)
+            continue
+        unit = next((u for u in _UNITS if u in norm[hit]), col.unit) if col.unit else ""
+        if unit != col.unit:
+            raise SchemaError(f"【{columns[hit]}】的单位是{unit}，【{col.name}】需为{col.unit}（请导出以{col.unit}为单位的列）")
+        used.add(hit)
+        found.append((col.name, columns[hit]))
+    if missing:
+        shown = "、".join(str(c) for c in columns[:20]) + ("…" if len(columns) > 20 else "")
+        raise SchemaError(f"缺少列：{'、'.join(missing)}（现有列：{shown}）")
+    return tuple(found)
+
+
+def read_header(path) -> list:
+    """只读取第一个 sheet 的表头行（xlsx 用 openpyxl 只读模式、csv 只读第一行，不解析数据行）"""
+    if os.path.splitext(str(path))[1].lower() in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            row = next(wb.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        return [c for c in row if c is not None]
+    if os.path.splitext(str(path))[1].lower() == ".csv":
+        from 流式读取 import read_csv_header
+        return read_csv_header(path)
+    import pandas as pd
+    return list(pd.read_excel(path, nrows=0).columns)
+
+
+def check_header(path, schema: str) -> tuple:
+    """只读表头检查输入文件是否包含 schema 要求的列，缺列时抛出带文件名的 SchemaError"""
+    try:
+        return resolve_columns(schema, tuple(read_header(path)))
+    except SchemaError as e:
+        raise SchemaError(f"『{os.path.basename(str(path))}』{e}") from None
+
+
+def _convert(s, dtype, errors, name):
+    import pandas as pd
+    from 数值清洗 import parse_numeric
+    from 面板数据 import as_codes, as_keys
+    if dtype == "number":
+        return parse_numeric(s)
+    if dtype == "count":
+        return parse_numeric(s, downcast="integer")
+    if dtype == "code":
+        return as_codes(s)
+    if dtype == "key":
+        return as_keys(s)
+    if dtype == "date":
+        out = pd.to_datetime(s, errors="coerce")
+        if errors == "raise":
+            bad = (out.isna() & s.notna() & (s.astype(str).str.strip() != "")).to_numpy()
+            if bad.any():
+                raise SchemaError(f"【{name}】列有无法识别的日期：{s.iloc[bad.argmax()]!r}（第 {bad.argmax() + 2} 行）")
+        return out
+    return s
+
+
+def apply_schema(df, schema: str, errors: str = "raise", source: str = ""):
+    """
+    校验并统一一张表：列名改为统一列名，各列按类型转换（数值去千分位、户数转整数、日期转 datetime、
+    组合代码补足4位并与组合名称等键列一起转为 category，见 面板数据.py）。
+    其他列原样保留。errors="coerce" 时无法识别的日期记为缺失（绘图数据中的备注行等），否则抛出 SchemaError。
+    """
+    columns = tuple(str(c).strip() for c in df.columns)
+    try:
+        mapping = resolve_columns(schema, columns)
+    except SchemaError as e:
+        raise SchemaError(f"{source}{e}") from None
+    df = df.copy()
+    df.columns = list(columns)
+    df = df.rename(columns={actual: name for name, actual in mapping if actual != name})
+    dtypes = {col.name: col.dtype for col in SCHEMAS[schema]}
+    for name, _ in mapping:
+        if dtypes[name] != "text":
+            df[name] = _convert(df[name], dtypes[name], errors, f"{source}{name}")
+    return df
@@ -1,31 +1,28 @@
+import numpy as np
 import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
+import datetime
 import os
 
+from 报表输出 import write_table
+from 面板数据 import to_display
+from 组合配置 import portfolio_order
+from 读取缓存 import read_excel_many
+from 运行记录 import run_main, stage
 
-def merge_combination_data():
-    # === 选择三张表格 ===
-    root = tk.Tk()
-    root.withdraw()
-
-    print("📄 请选择第一张表格（投资收益数据）")
-    file1 = filedialog.askopenfilename(title="选择表格1", filetypes=[("Excel files", "*.xlsx")])
-    print("📄 请选择第二张表格（资金与客户数变化）")
-    file2 = filedialog.askopenfilename(title="选择表格2", filetypes=[("Excel files", "*.xlsx")])
-    print("📄 请选择第三张表格（总资产与客户数）")
-    file3 = filedialog.askopenfilename(title="选择表格3", filetypes=[("Excel files", "*.xlsx")])
-
-    if not file1 or not file2 or not file3:
-        print("❌ 有文件未选择，程序终止。")
-        return
+# 表格4中的日期以文本显示（与手工报表一致），只在写出时格式化
+DATE_FORMAT = "%Y/%m/%d"
 
-    # === 读取三张表格 ===
-    df1 = pd.read_excel(file1)
-    df2 = pd.read_excel(file2)
-    df3 = pd.read_excel(file3)
 
+def build_final_table(df1, df2, df3):
+    """
+    合并三张结果表（不涉及弹窗和文件读写），返回基金数据统计结果 DataFrame（日期列为 datetime64，
+    写出前用 to_display(df, DATE_FORMAT) 转为显示用的文本）。
+    df1：组合收益率计算结果；df2：签解约客户数和资金增减计算结果；df3：客户数和总资产计算结果。
+    """
     # === 清洗列名，去除空格 ===
+    df1 = df1.copy()
+    df2 = df2.copy()
+    df3 = df3.copy()
     df1.columns = df1.columns.str.strip()
     df2.columns = df2.columns.str.strip()
     df3.columns = df3.columns.str.strip()
@@ -40,41 +37,34 @@ def merge_combination_data():
     df_merge3 = df3[["组合名称", "客户数", "总资产(万元)"]].copy()
 
     # === 合并所有数据到表格1 ===
+    # 按（组合名称, 出现序号）连接：表格1中同名组合（如 t 日和 t-1 日的“货币增强”）只有第一次出现的行
+    # 匹配资金、客户数，其余行保持为空；表2、表3中组合名称重复时直接报错，不会悄悄放大行数
     df_final = df1.copy()
+    df_final["出现序号"] = df_final.groupby("组合名称", sort=False).cumcount()
+    df_merge2["出现序号"] = 0
+    df_merge3["出现序号"] = 0
 
     # 注意 merge：左连接，以表格1为主，避免因组合顺序不同导致遗漏
-    df_final = pd.merge(df_final, df_merge2, how="left", on="组合名称")
-    df_final = pd.merge(df_final, df_merge3, how="left", on="组合名称")
-
-    # === 处理“货币增强”组合：仅保留第一次匹配结果 ===
-    if (df_final["组合名称"] == "货币增强").sum() > 1:
-        idx = df_final[df_final["组合名称"] == "货币增强"].index[0]
-        dup_idx = df_final[df_final["组合名称"] == "货币增强"].index[1:]
-        df_final.loc[dup_idx, ["签约客户数(户)", "解约客户数(户)", "新增金额（万元）", "减少金额（万元）", "客户数",
-                               "总资产(万元)"]] = None
+    with stage("结果汇总-合并", rows_in=df_final) as st:
+        df_final = pd.merge(df_final, df_merge2, how="left", on=["组合名称", "出现序号"], validate="many_to_one")
+        df_final = st.rows(pd.merge(df_final, df_merge3, how="left", on=["组合名称", "出现序号"],
+                                    validate="many_to_one"))
 
     df_final["总份额（万份）"] = df_final["总资产(万元)"] / df_final["组合净值"]
 
-    df_final["净值日期"] = pd.to_datetime(df_final["净值日期"]).dt.strftime("%Y/%m/%d")
-    df_final["起始日期"] = pd.to_datetime(df_final["起始日期"]).dt.strftime("%Y/%m/%d")
+    df_final["净值日期"] = pd.to_datetime(df_final["净值日期"])
+    df_final["起始日期"] = pd.to_datetime(df_final["起始日期"])
 
     # === 组合排序 ===
-    # 固定顺序（注意：不含最后一行“货币增强”）
-    custom_order = [
-        "股债平衡", "债券稳健", "货币增强", "股票精选", "量化睿选", "同业存单",
-        "固收增强", "债券臻选", "指增严选", "偏股智选", "消费严选", "短债优选",
-        "红利优选", "先进制造"
-    ]
-
-    # 提取最后一行“货币增强”
-    last_row = df_final.iloc[[-1]] if df_final.iloc[-1]["组合名称"] == "货币增强" else pd.DataFrame()
-
-    # 排除最后一行并按指定顺序排序
-    df_except_last = df_final.iloc[:-1] if not last_row.empty else df_final.copy()
-    df_except_last = df_except_last.set_index("组合名称").loc[custom_order].reset_index()
-
-    # 合并排序结果 + 原末尾“货币增强”
-    df_final = pd.concat([df_except_last, last_row], ignore_index=True)
+    # 一次稳定排序：按组合配置.toml 中的顺序；未配置的组合随后（保持原顺序）；同名的第二行排在最后
+    rank = {name: i for i, name in enumerate(portfolio_order())}
+    sort_key = np.where(df_final["出现序号"].to_numpy() > 0, len(rank) + 1,
+                        df_final["组合名称"].map(rank).fillna(len(rank)).to_numpy())
+    unknown = df_final.loc[sort_key == len(rank), "组合名称"].astype(str).tolist()
+    if unknown:
+        shown = "、".join(unknown[:10]) + (f" 等 {len(unknown)} 个" if len(unknown) > 10 else "")
+        print(f"ℹ️ 以下组合未在组合配置中，排在其他组合之后：{shown}")
+    df_final = df_final.iloc[np.argsort(sort_key, kind="stable")].reset_index(drop=True)
 
     # 统一把“组合名称”显示为“……组合”
     df_final["组合名称"] = (
@@ -84,7 +74,7 @@ def merge_combination_data():
     )
 
     # 删除不需要的列
-    df_final.drop(columns=["策略名称", "组合代码"], inplace=True)
+    df_final.drop(columns=["策略名称", "组合代码", "出现序号"], inplace=True)
 
     # 设置导出列顺序
     columns_order = [
@@ -133,20 +123,50 @@ def merge_combination_data():
     ]
     df_final = df_final[final_cols]
 
+    return df_final
+
+
+def merge_combination_data():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    # === 选择三张表格 ===
+    with stage("选择文件"):
+        root = tk.Tk()
+        root.withdraw()
+
+        print("📄 请选择第一张表格（投资收益数据）")
+        file1 = filedialog.askopenfilename(title="选择表格1", filetypes=[("Excel files", "*.xlsx")])
+        print("📄 请选择第二张表格（资金与客户数变化）")
+        file2 = filedialog.askopenfilename(title="选择表格2", filetypes=[("Excel files", "*.xlsx")])
+        print("📄 请选择第三张表格（总资产与客户数）")
+        file3 = filedialog.askopenfilename(title="选择表格3", filetypes=[("Excel files", "*.xlsx")])
+
+    if not file1 or not file2 or not file3:
+        print("❌ 有文件未选择，程序终止。")
+        return 1
+
+    # === 同时读取三张表格 ===
+    with stage("读取-表格1/2/3") as st:
+        df1, df2, df3 = read_excel_many([file1, file2, file3])
+        st.rows(df3)
+
+    with stage("结果汇总", rows_in=df1) as st:
+        df_final = st.rows(build_final_table(df1, df2, df3))
+
     #    # === 输出文件 ===
     # output_path = os.path.join(os.getcwd(), "合并结果_基金组合数据.xlsx")
 
     # === 输出文件（自动带昨天日期，保存在脚本所在目录） ===
-    import datetime
-
     script_dir = os.path.dirname(os.path.abspath(__file__))  # 脚本所在目录
     yesterday_str = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
     output_path = os.path.join(script_dir, f"基金数据统计结果_{yesterday_str}.xlsx")
 
-    df_final.to_excel(output_path, index=False)
+    with stage("写出", rows_in=df_final):
+        write_table(to_display(df_final, DATE_FORMAT), output_path)
     print(f"✅ 合并完成，已保存到：{output_path}")
 
 
 # === 执行主程序 ===
 if __name__ == "__main__":
-    merge_combination_data()
+    run_main(merge_combination_data)
@@ -1,33 +1,62 @@
 import pandas as pd
-from tkinter import Tk, filedialog
 import datetime
 import os
-from tkinter import Tk, filedialog
 
-def process_net_value_file():
-    # 弹出文件选择窗口
-    root = Tk()
-    root.withdraw()
-    file_path = filedialog.askopenfilename(
-        title="请选择净值数据Excel文件",
-        filetypes=[("Excel files", "*.xlsx *.xls")]
-    )
+from 收益引擎 import annualize
+from 报表输出 import write_table
+from 组合配置 import start_dates_complete, start_dates_table
+from 表格结构 import apply_schema
+from 读取缓存 import read_excel_many
+from 运行记录 import run_main, stage
 
-    if not file_path:
-        print("❌ 未选择文件，程序终止。")
-        return
+# 年化方式：linear 为 累计收益 / 运行天数 × 365（默认，与历史报表一致），compound 为复利年化；
+# 可用环境变量 FUND_ANNUALIZATION 覆盖
+ANNUALIZATION = os.environ.get("FUND_ANNUALIZATION", "linear")
+
+
+def _add_return_columns(df_result, df_start, annualization=None):
+    """合并起始日期，计算运行天数、累计收益、超额收益和年化收益列"""
+    # 确保净值日期为 datetime 类型
+    df_result["净值日期"] = pd.to_datetime(df_result["净值日期"])
+
+    # 确保列名统一、起始日期为日期类型
+    df_start = apply_schema(df_start, "起始日期", source="起始日期表")
+
+    # === 合并到 df_result 中 ===
+    df_result = df_result.merge(df_start, on="组合名称", how="left")
+
+    # 添加运行天数列（日期保持 datetime64，写出时按日期单元格显示）
+    df_result["运行天数"] = (df_result["净值日期"] - df_result["起始日期"]).dt.days
+
+    # 增加累计收益列
+    df_result["组合累计收益"] = df_result["组合净值"] - 1
+    df_result["基准累计收益"] = df_result["基准净值"] - 1
+
+    # 增加超额收益列
+    df_result["超额收益"] = df_result["组合累计收益"] - df_result["基准累计收益"]
+
+    # 年化收益列
+    method = annualization or ANNUALIZATION
+    df_result["组合年化收益"] = annualize(df_result["组合累计收益"], df_result["运行天数"], method)
+    df_result["基准年化收益"] = annualize(df_result["基准累计收益"], df_result["运行天数"], method)
+
+    return df_result
 
-    # 读取Excel
-    df = pd.read_excel(file_path)
 
-    # 转换净值日期为 datetime.date 类型
-    df["净值日期"] = pd.to_datetime(df["净值日期"]).dt.date
+def compute_net_value_result(df, df_start, annualization=None):
+    """
+    由净值数据和起始日期数据计算组合收益率结果（不涉及弹窗和文件读写）。
+    返回 (df_result, t_date, t_1_date)，t_date / t_1_date 为 datetime.date；数据中不足两个日期时返回 None。
+    annualization：年化方式 linear / compound，默认取 ANNUALIZATION。
+    """
+    # 校验列、统一列名和类型（组合代码补足4位、键列为 category、净值日期为 datetime64）
+    df = apply_schema(df, "净值", source="净值数据")
 
     # 获取最新两天的日期
-    unique_dates = sorted(df["净值日期"].unique(), reverse=True)
+    unique_dates = sorted(df["净值日期"].dropna().unique(), reverse=True)
     if len(unique_dates) < 2:
         print("❌ 数据中不足两个日期，无法执行。")
-        return
+        return None
 
     t_date = unique_dates[0]
     t_1_date = unique_dates[1]
@@ -44,53 +73,70 @@ def process_net_value_file():
     # 合并结果
     df_result = pd.concat([df_t, df_t1_currency], ignore_index=True)
 
-    # 构造输出文件名
-    base_name = os.path.splitext(os.path.basename(file_path))[0]
-    output_name = f"{base_name}_净值提取结果_{t_date}.xlsx"
-    output_path = os.path.join(os.path.dirname(file_path), output_name)
-
-    # 保留前导0
-    df_result["组合代码"] = df_result["组合代码"].astype(str).str.zfill(4)
+    df_result = _add_return_columns(df_result, df_start, annualization)
 
-    from datetime import datetime
+    return df_result, t_date.date(), t_1_date.date()
 
-    # 设置起始日期（例如2025年5月10日）
-    start_date = pd.to_datetime("2025-05-10")
-
-    # 确保净值日期为 datetime 类型
-    df_result["净值日期"] = pd.to_datetime(df_result["净值日期"])
 
-    # === 弹窗让用户选择“起始日期表格” ===
-    root = Tk()
-    root.withdraw()
-    file_start_date = filedialog.askopenfilename(title="请选择包含起始日期的Excel文件",
-                                                 filetypes=[("Excel Files", "*.xlsx *.xls")])
-
-    # === 读取起始日期数据 ===
-    df_start = pd.read_excel(file_start_date)
-
-    # 确保列名统一（根据你截图）
-    df_start = df_start.rename(columns={"组合名称": "组合名称", "起始日期": "起始日期"})
-
-    # === 合并到 df_result 中 ===
-    df_result = df_result.merge(df_start, on="组合名称", how="left")
+def compute_return_history(df, df_start, date_from=None, date_to=None, annualization=None):
+    """
+    回溯模式：一次性计算日期范围内（含首尾）每个组合每个净值日期的收益率，返回长表（每行为一个组合一天）。
+    列与日报的组合收益率计算结果一致；日报中 t-1 日“活钱管理”的特殊处理在长表中自然包含，无需单独处理。
+    """
+    df = apply_schema(df, "净值", source="净值数据")
+    dates = df["净值日期"]
+    mask = dates.notna()
+    if date_from is not None:
+        mask &= dates >= pd.Timestamp(date_from)
+    if date_to is not None:
+        mask &= dates <= pd.Timestamp(date_to)
+    df = df[mask].copy()
+    df["净值日期"] = dates[mask]
 
-    # 添加运行天数列
-    df_result["运行天数"] = (df_result["净值日期"] - df_result["起始日期"]).dt.days
+    df_result = _add_return_columns(df.sort_values(["净值日期", "组合代码"], kind="stable"), df_start, annualization)
+    return df_result.reset_index(drop=True)
 
-    df_result["净值日期"] = df_result["净值日期"].dt.date
-    df_result["起始日期"] = df_result["起始日期"].dt.date
 
-    # 增加累计收益列
-    df_result["组合累计收益"] = df_result["组合净值"] - 1
-    df_result["基准累计收益"] = df_result["基准净值"] - 1
+def process_net_value_file():
+    from tkinter import Tk, filedialog
 
-    # 增加超额收益列
-    df_result["超额收益"] = df_result["组合累计收益"] - df_result["基准累计收益"]
+    # 弹出文件选择窗口
+    with stage("选择文件-净值"):
+        root = Tk()
+        root.withdraw()
+        file_path = filedialog.askopenfilename(
+            title="请选择净值数据Excel文件",
+            filetypes=[("Excel files", "*.xlsx *.xls")]
+        )
 
-    # 年化收益列
-    df_result["组合年化收益"] = df_result["组合累计收益"] / df_result["运行天数"] * 365
-    df_result["基准年化收益"] = df_result["基准累计收益"] / df_result["运行天数"] * 365
+    if not file_path:
+        print("❌ 未选择文件，程序终止。")
+        return 1
+
+    # === 弹窗让用户选择“起始日期表格”（组合配置.toml 中已填写全部起始日期时无需选择）===
+    file_start_date = None
+    if not start_dates_complete():
+        with stage("选择文件-起始日期"):
+            root = Tk()
+            root.withdraw()
+            file_start_date = filedialog.askopenfilename(title="请选择包含起始日期的Excel文件",
+                                                         filetypes=[("Excel Files", "*.xlsx *.xls")])
+        if not file_start_date:
+            print("❌ 未选择起始日期表格，程序终止。")
+            return 1
+
+    # === 同时读取净值和起始日期表格（组合配置中填写了起始日期的组合以配置为准）===
+    with stage("读取-净值和起始日期") as st:
+        frames = read_excel_many([file_path] + ([file_start_date] if file_start_date else []))
+        df = st.rows(frames[0])
+        df_start = start_dates_table(frames[1] if file_start_date else None)
+
+    with stage("计算-组合收益率", rows_in=df) as st:
+        result = compute_net_value_result(df, df_start)
+        st.rows(result[0] if result is not None else None)
+    if result is None:
+        return 1
+    df_result, t_date, t_1_date = result
 
     # # 保存为新文件
     # with pd.ExcelWriter("组合净值结果.xlsx", engine='xlsxwriter', date_format='yyyy/m/d') as writer:
@@ -102,20 +148,19 @@ def process_net_value_file():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     # output_file = os.path.join(script_dir, "组合净值结果.xlsx")
 
-    import datetime
     yesterday_str = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
     output_file = os.path.join(script_dir, f"组合收益率计算结果_{yesterday_str}.xlsx")
 
-    # 保存为 Excel 文件
-    with pd.ExcelWriter(output_file, engine='xlsxwriter', date_format='yyyy/m/d') as writer:
-        df_result.to_excel(writer, index=False)
+    # 保存为 Excel 文件（日期显示为 yyyy/m/d）
+    with stage("写出", rows_in=df_result):
+        write_table(df_result, output_file)
 
     print(f"✅ 提取完成，文件已保存为：{output_file}")
     print(f"📌 包含 {t_date} 全部数据 + {t_1_date} 的活钱管理策略，共 {len(df_result)} 条记录")
 
 # 运行主程序
 if __name__ == "__main__":
-    process_net_value_file()
+    run_main(process_net_value_file)
 
 
 
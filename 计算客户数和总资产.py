@@ -1,77 +1,105 @@
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
+import datetime
+import os
 
-def process_excel_summary():
-    # === 打开文件选择窗口 ===
-    root = tk.Tk()
-    root.withdraw()
-    file_path = filedialog.askopenfilename(title="请选择Excel文件", filetypes=[("Excel Files", "*.xlsx")])
-    if not file_path:
-        print("❌ 未选择文件")
-        return
-
-    # === 读取文件 ===
-    df = pd.read_excel(file_path)
-
-    # === 清洗列名，去除前后空格 ===
-    df.columns = df.columns.str.strip()
-
-    # === 在过滤前读取“客户小计”行的“客户数”并打印 ===
-    # NEW: 尝试找到包含“客户数”的列名（如：客户数、客户数(户)…）
-    cust_col = None
-    for c in df.columns:
-        if "客户数" in c:
-            cust_col = c
-            break
-
-    if cust_col is not None:
-        # 在任一列出现“客户小计”的行中取第一条
-        mask_subtotal = df.apply(lambda s: s.astype(str).str.contains("客户小计", na=False), axis=0).any(axis=1)
-        subtotal_rows = df[mask_subtotal]
-        if not subtotal_rows.empty:
-            val = str(subtotal_rows.iloc[0][cust_col]).replace(",", "")
-            try:
-                val_num = float(val)
-            except ValueError:
-                val_num = pd.to_numeric(val, errors="coerce")
-            print(f"📌 客户小计（列：{cust_col}）：{val_num}")
-        else:
-            print("ℹ️ 未找到包含“客户小计”的行，跳过打印。")
+from 流式读取 import GroupSums, iter_chunks, use_streaming
+from 表格工具 import find_marker_row
+from 表格结构 import apply_schema
+from 报表输出 import write_table
+from 读取缓存 import read_excel_cached
+from 运行记录 import run_main, stage
+
+VALUE_COLUMNS = ["客户数", "总资产(元)"]
+
+
+def _print_subtotal(df, ridx):
+    if ridx is not None:
+        print(f"📌 客户小计（列：客户数）：{df.at[ridx, '客户数']}")
     else:
-        print("ℹ️ 未找到包含“客户数”的列，跳过打印。")
+        print("ℹ️ 未找到包含“客户小计”的行，跳过打印。")
+
 
-    # === 去除“客户数”中的逗号，转为数字 ===
-    df["客户数"] = pd.to_numeric(df["客户数"].astype(str).str.replace(",", ""), errors='coerce')
+def summarize_assets(df):
+    """按组合名称汇总客户数和总资产（不涉及弹窗和文件读写），返回汇总结果 DataFrame。"""
+    with stage("客户数和总资产-清洗", rows_in=df) as st:
+        # === 校验列、统一列名（如 客户数(户) → 客户数），客户数、总资产(元) 去除千分位转为数字 ===
+        df = apply_schema(df, "资产", source="总资产和客户数表格")
 
-    # === 去除“总资产(元)”中的逗号，转为数字 ===
-    df["总资产(元)"] = pd.to_numeric(df["总资产(元)"].astype(str).str.replace(",", ""), errors='coerce')
+        # === 在过滤前读取“客户小计”行的“客户数”并打印 ===
+        _print_subtotal(df, find_marker_row(df, "客户小计"))
 
-    # === 删除组合名称为空的行（如“汇总”行） ===
-    df = df[df["组合名称"].notna()]
+        # === 删除组合名称为空的行（如“汇总”行） ===
+        df = st.rows(df[df["组合名称"].notna()])
 
     # === 分组汇总（包含总资产为0的） ===
-    grouped = df.groupby("组合名称", as_index=False).agg({
-        "客户数": "sum",
-        "总资产(元)": "sum"
-    })
+    with stage("客户数和总资产-分组汇总", rows_in=df) as st:
+        grouped = st.rows(df.groupby("组合名称", as_index=False).agg({
+            "客户数": "sum",
+            "总资产(元)": "sum"
+        }))
 
     # === 新增一列“总资产(万元)” ===
     grouped["总资产(万元)"] = grouped["总资产(元)"] / 10000
 
-    import os
-    import datetime
+    return grouped
+
+
+def summarize_assets_stream(path, chunk_rows=None):
+    """
+    与 summarize_assets 结果相同，但逐块读取文件 path（xlsx / csv）、边读边按组合累加，
+    客户级明细有数百万行时内存占用也不随文件增大。“客户小计”行在读取过程中顺带找出。
+    """
+    sums = GroupSums("组合名称", VALUE_COLUMNS)
+    subtotal = None  # 找到“客户小计”后保存该行，后续块不再查找
+    n_rows = 0
+    with stage("客户数和总资产-流式汇总") as st:
+        for chunk in iter_chunks(path, chunk_rows):
+            n_rows += len(chunk)
+            chunk = apply_schema(chunk, "资产", source="总资产和客户数表格")
+            if subtotal is None:
+                ridx = find_marker_row(chunk, "客户小计")
+                if ridx is not None:
+                    subtotal = chunk.loc[[ridx]]
+            sums.add(chunk[chunk["组合名称"].notna()])
+        st.rows_in = n_rows
+        grouped = st.rows(sums.result())
+    _print_subtotal(subtotal, None if subtotal is None else subtotal.index[0])
+
+    grouped["总资产(万元)"] = grouped["总资产(元)"] / 10000
+    return grouped
+
+
+def process_excel_summary():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    # === 打开文件选择窗口 ===
+    with stage("选择文件"):
+        root = tk.Tk()
+        root.withdraw()
+        file_path = filedialog.askopenfilename(title="请选择Excel文件", filetypes=[("Excel Files", "*.xlsx"), ("CSV 文件", "*.csv")])
+    if not file_path:
+        print("❌ 未选择文件")
+        return 1
+
+    # === 读取文件（客户级明细等大文件、csv 逐块读取） ===
+    if use_streaming(file_path):
+        grouped = summarize_assets_stream(file_path)
+    else:
+        with stage("读取-总资产和客户数") as st:
+            df = st.rows(read_excel_cached(file_path))
+        grouped = summarize_assets(df)
 
     # === 输出结果到当前项目目录 ===
     # file_name = os.path.basename(file_path).replace(".xlsx", "_组合汇总结果.xlsx")
     yesterday_str = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
     file_name = f"客户数和总资产计算结果_{yesterday_str}.xlsx"
     output_path = os.path.join(os.getcwd(), file_name)
-    grouped.to_excel(output_path, index=False)
+    with stage("写出", rows_in=grouped):
+        write_table(grouped, output_path)
 
     print(f"✅ 汇总完成，已保存为：{output_path}")
 
 # === 运行主程序 ===
 if __name__ == "__main__":
-    process_excel_summary()
+    run_main(process_excel_summary)
 
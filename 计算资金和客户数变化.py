@@ -1,112 +1,149 @@
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
-
-def summarize_contract_flow():
-    # === 打开文件选择窗口 ===
-    root = tk.Tk()
-    root.withdraw()
-    file_path = filedialog.askopenfilename(title="请选择Excel文件", filetypes=[("Excel 文件", "*.xlsx")])
-    if not file_path:
-        print("❌ 未选择文件")
+import datetime
+import os
+
+from 流式读取 import GroupSums, iter_chunks, use_streaming
+from 表格工具 import find_marker_row
+from 表格结构 import SchemaError, apply_schema
+from 报表输出 import write_table
+from 读取缓存 import read_excel_cached
+from 运行记录 import run_main, stage
+
+SIGN_COL = "签约客户数(户)"
+CANCEL_COL = "解约客户数(户)"
+VALUE_COLUMNS = [SIGN_COL, "转入资金(元)", CANCEL_COL, "转出资金(元)"]
+
+
+def _col_idx_to_letter(idx0: int) -> str:
+    """Excel 列号（从 0 开始）→ 列字母"""
+    n = idx0 + 1
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def _print_dedup_cells(df, ridx):
+    """打印“客户去重”行的【签约客户数(户)、解约客户数(户)】两个单元格的地址和值"""
+    if ridx is None:
+        print("ℹ️ 未定位到“客户去重”行，跳过提取。")
         return
+    excel_row = ridx + 2  # 默认第1行为表头
+    for col in (SIGN_COL, CANCEL_COL):
+        addr = f"{_col_idx_to_letter(df.columns.get_loc(col))}{excel_row}"
+        print(f"📌 单元格（客户去重，{col}） -> {addr} = {df.at[ridx, col]}")
 
-    # === 读取Excel文件 ===
-    df = pd.read_excel(file_path)
 
-    # === 清洗列名，去除前后空格 ===
-    df.columns = df.columns.str.strip()
+def summarize_flow(df):
+    """按组合名称汇总签解约客户数和资金增减（不涉及弹窗和文件读写）；缺少必要列时返回 None。"""
+    # === 校验列、统一列名，户数和资金去除千分位转为数值 ===
+    try:
+        df = apply_schema(df, "资金", source="签解约和资金表格")
+    except SchemaError as e:
+        print(f"❌ {e}")
+        return None
 
     # === 提取“客户去重”行的【签约客户数(户)、解约客户数(户)】两个单元格的值 ===
-    sign_col = "签约客户数(户)"
-    cancel_col = "解约客户数(户)"
-
-    if sign_col in df.columns and cancel_col in df.columns:
-        # 精确匹配组合名称 == 客户去重
-        row_mask = df["组合名称"].astype(str).str.strip().eq("客户去重")
-        row = df[row_mask]
-
-        # 如果没找到，则兜底匹配（任意列包含“客户去重”）
-        if row.empty:
-            any_mask = df.astype(str).apply(lambda s: s.str.contains("客户去重", na=False))
-            row = df[any_mask.any(axis=1)]
-
-        if not row.empty:
-            ridx = row.index[0]
-
-            def _to_num(x):
-                return pd.to_numeric(str(x).replace(",", "").replace("，", ""), errors="coerce")
-
-            val_sign = _to_num(df.at[ridx, sign_col])
-            val_cancel = _to_num(df.at[ridx, cancel_col])
-
-            # Excel 坐标转换
-            def col_idx_to_letter(idx0: int) -> str:
-                n = idx0 + 1
-                s = ""
-                while n > 0:
-                    n, r = divmod(n - 1, 26)
-                    s = chr(65 + r) + s
-                return s
-
-            excel_row = ridx + 2  # 默认第1行为表头
-            sign_addr = f"{col_idx_to_letter(df.columns.get_loc(sign_col))}{excel_row}"
-            cancel_addr = f"{col_idx_to_letter(df.columns.get_loc(cancel_col))}{excel_row}"
-
-            print(f"📌 单元格（客户去重，{sign_col}） -> {sign_addr} = {val_sign}")
-            print(f"📌 单元格（客户去重，{cancel_col}） -> {cancel_addr} = {val_cancel}")
-        else:
-            print("ℹ️ 未定位到“客户去重”行，跳过提取。")
-    else:
-        print("ℹ️ 缺少【签约客户数(户)】或【解约客户数(户)】列，无法提取。")
-
-    # === 要提取和处理的列 ===
-    required_columns = [
-        "组合名称",
-        "签约客户数(户)",
-        "转入资金(元)",
-        "解约客户数(户)",
-        "转出资金(元)"
-    ]
-
-    # === 检查是否所有列都存在 ===
-    for col in required_columns:
-        if col not in df.columns:
-            print(f"❌ 缺少列：{col}")
-            return
-
-    # === 去除“组合名称”为空的行 ===
-    df = df[df["组合名称"].notna()]
-
-    # === 去除千位分隔符，转为数值 ===
-    for col in required_columns[1:]:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ""), errors='coerce')
+    # 精确匹配组合名称 == 客户去重
+    ridx = find_marker_row(df, "客户去重", columns=["组合名称"], exact=True)
+
+    # 如果没找到，则兜底匹配（任意列包含“客户去重”）
+    if ridx is None:
+        ridx = find_marker_row(df, "客户去重")
+
+    _print_dedup_cells(df, ridx)
+
+    with stage("签解约和资金-清洗", rows_in=df) as st:
+        # === 去除“组合名称”为空的行 ===
+        df = st.rows(df[df["组合名称"].notna()])
 
     # === 分类汇总 ===
-    grouped = df.groupby("组合名称", as_index=False).agg({
-        "签约客户数(户)": "sum",
-        "转入资金(元)": "sum",
-        "解约客户数(户)": "sum",
-        "转出资金(元)": "sum"
-    })
+    with stage("签解约和资金-分组汇总", rows_in=df) as st:
+        grouped = st.rows(df.groupby("组合名称", as_index=False).agg({
+            "签约客户数(户)": "sum",
+            "转入资金(元)": "sum",
+            "解约客户数(户)": "sum",
+            "转出资金(元)": "sum"
+        }))
 
     # === 新增计算列 ===
     grouped["新增金额（万元）"] = grouped["转入资金(元)"] / 10000
     grouped["减少金额（万元）"] = grouped["转出资金(元)"] / 10000
 
+    return grouped
+
+
+def summarize_flow_stream(path, chunk_rows=None):
+    """
+    与 summarize_flow 结果相同，但逐块读取文件 path（xlsx / csv）、边读边按组合累加，内存占用不随文件增大；
+    缺少必要列时返回 None。“客户去重”行在读取过程中顺带找出：组合名称恰为“客户去重”的行优先，
+    没有时取第一个任意列包含“客户去重”的行。
+    """
+    sums = GroupSums("组合名称", VALUE_COLUMNS)
+    exact = fallback = None  # 找到的标记行（单行 DataFrame，保留原行号和列顺序）
+    n_rows = 0
+    with stage("签解约和资金-流式汇总") as st:
+        for chunk in iter_chunks(path, chunk_rows):
+            n_rows += len(chunk)
+            try:
+                chunk = apply_schema(chunk, "资金", source="签解约和资金表格")
+            except SchemaError as e:
+                print(f"❌ {e}")
+                return None
+            if exact is None:
+                ridx = find_marker_row(chunk, "客户去重", columns=["组合名称"], exact=True)
+                if ridx is not None:
+                    exact = chunk.loc[[ridx]]
+                elif fallback is None:
+                    ridx = find_marker_row(chunk, "客户去重")
+                    if ridx is not None:
+                        fallback = chunk.loc[[ridx]]
+            sums.add(chunk[chunk["组合名称"].notna()])
+        st.rows_in = n_rows
+        grouped = st.rows(sums.result())
+    marker = exact if exact is not None else fallback
+    _print_dedup_cells(marker, None if marker is None else marker.index[0])
+
+    grouped["新增金额（万元）"] = grouped["转入资金(元)"] / 10000
+    grouped["减少金额（万元）"] = grouped["转出资金(元)"] / 10000
+    return grouped
+
+
+def summarize_contract_flow():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    # === 打开文件选择窗口 ===
+    with stage("选择文件"):
+        root = tk.Tk()
+        root.withdraw()
+        file_path = filedialog.askopenfilename(title="请选择Excel文件", filetypes=[("Excel 文件", "*.xlsx"), ("CSV 文件", "*.csv")])
+    if not file_path:
+        print("❌ 未选择文件")
+        return 1
+
+    # === 读取Excel文件（客户级明细等大文件、csv 逐块读取） ===
+    if use_streaming(file_path):
+        grouped = summarize_flow_stream(file_path)
+    else:
+        with stage("读取-签解约和资金") as st:
+            df = st.rows(read_excel_cached(file_path))
+        grouped = summarize_flow(df)
+    if grouped is None:
+        return 1
+
     # === 导出到当前目录的汇总表格 ===
-    import os
-    import datetime
     # === 自动生成文件名（昨天的日期） ===
     yesterday_str = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
     output_file_name = f"签解约客户数和资金增减计算结果_{yesterday_str}.xlsx"
 
     # === 保存到项目目录 ===
     output_path = os.path.join(os.getcwd(), output_file_name)
-    grouped.to_excel(output_path, index=False)
+    with stage("写出", rows_in=grouped):
+        write_table(grouped, output_path)
 
     print(f"✅ 汇总完成，结果已保存为：{output_path}")
 
 # === 运行主程序 ===
 if __name__ == "__main__":
-    summarize_contract_flow()
\ No newline at end of file
+    run_main(summarize_contract_flow)
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+源数据表格读取缓存
+
+pd.read_excel 需要用 openpyxl 逐个解析 XML，净值历史越长越慢。这里把解析好的 DataFrame 以 Parquet
+（未安装 pyarrow 或数据无法转换时退回 pickle）保存到缓存目录，同一文件内容、同一读取参数再次读取时直接加载缓存。
+
+- 缓存键：文件内容的 SHA-256 + 读取参数；文件路径、大小、修改时间不变时直接复用上次算出的哈希，不必重读文件
+- 缓存总大小超过上限时，按最近使用时间淘汰最旧的缓存文件
+- 环境变量：FUND_REPORT_CACHE_DIR 缓存目录；FUND_REPORT_CACHE_MB 缓存上限（MB，默认 512）；FUND_REPORT_CACHE=0 关闭缓存
+- read_excel_many 同时读取多个表格：没有缓存的文件分发到进程池并行解析，总耗时约等于最慢的一个文件；
+  FUND_READ_WORKERS 指定进程数（1 为逐个读取）
+"""
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".excel_cache")
+DEFAULT_MAX_MB = 512
+INDEX_FILE = "index.json"
+# 待解析文件总大小低于该值时逐个读取：小文件解析很快，启动进程池反而更慢（显式传入 workers 或设置 FUND_READ_WORKERS 时不受此限制）
+PARALLEL_MIN_BYTES = 1 << 20
+
+
+def _cache_dir():
+    return os.environ.get("FUND_REPORT_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def _cache_enabled():
+    return os.environ.get("FUND_REPORT_CACHE", "1") != "0"
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    # 先写临时文件再替换，避免并发读取时读到半个文件
+    tmp = os.path.join(cache_dir, f"{INDEX_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(cache_dir, INDEX_FILE))
+
+
+def file_digest(path, cache_dir=None):
+    """返回文件内容的 SHA-256；路径、大小、修改时间都没变时直接取上次记录的结果"""
+    cache_dir = cache_dir or _cache_dir()
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    abs_path = os.path.abspath(path)
+
+    index = _load_index(cache_dir)
+    entry = index.get(abs_path)
+    if entry and entry["stamp"] == stamp:
+        return entry["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _load_index(cache_dir)
+    index[abs_path] = {"stamp": stamp, "sha256": digest}
+    _save_index(cache_dir, index)
+    return digest
+
+
+def _cache_key(path, kwargs, cache_dir):
+    params = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+    raw = f"{file_digest(path, cache_dir)}|{params}|{pd.__version__}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _write_cache(obj, base):
+    """优先写 Parquet；非 DataFrame、未安装 pyarrow 或列类型无法转换时写 pickle"""
+    if isinstance(obj, pd.DataFrame):
+        try:
+            obj.to_parquet(base + ".parquet.tmp")
+            os.replace(base + ".parquet.tmp", base + ".parquet")
+            return
+        except Exception:
+            if os.path.exists(base + ".parquet.tmp"):
+                os.remove(base + ".parquet.tmp")
+    with open(base + ".pkl.tmp", "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(base + ".pkl.tmp", base + ".pkl")
+
+
+def _read_cache(base):
+    if os.path.exists(base + ".parquet"):
+        os.utime(base + ".parquet")  # 记录最近使用时间，供淘汰使用
+        return pd.read_parquet(base + ".parquet")
+    if os.path.exists(base + ".pkl"):
+        os.utime(base + ".pkl")
+        with open(base + ".pkl", "rb") as f:
+            return pickle.load(f)
+    return None
+
+
+def evict_cache(cache_dir=None, max_mb=None):
+    """缓存总大小超过上限时，按最近使用时间从旧到新删除缓存文件"""
+    cache_dir = cache_dir or _cache_dir()
+    if max_mb is None:
+        max_mb = float(os.environ.get("FUND_REPORT_CACHE_MB", DEFAULT_MAX_MB))
+    limit = max_mb * 1024 * 1024
+
+    files = []
+    for name in os.listdir(cache_dir):
+        if name.endswith((".parquet", ".pkl")):
+            p = os.path.join(cache_dir, name)
+            st = os.stat(p)
+            files.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in files)
+    for _, size, p in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(p)
+            total -= size
+        except OSError:
+            pass
+
+
+def read_excel_cached(path, **kwargs):
+    """与 pd.read_excel(path, **kwargs) 用法相同，但优先从缓存加载"""
+    if not _cache_enabled():
+        return pd.read_excel(path, **kwargs)
+
+    cache_dir = _cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        base = os.path.join(cache_dir, _cache_key(path, kwargs, cache_dir))
+        cached = _read_cache(base)
+    except Exception:
+        # 缓存目录不可用或缓存文件损坏时，退回直接读取
+        return pd.read_excel(path, **kwargs)
+    if cached is not None:
+        return cached
+
+    df = pd.read_excel(path, **kwargs)
+    try:
+        _write_cache(df, base)
+        evict_cache(cache_dir)
+    except Exception as e:
+        print(f"ℹ️ 写入读取缓存失败，已跳过：{e}")
+    return df
+
+
+def _load_cached(path, kwargs):
+    """只查缓存：有缓存时返回 DataFrame，没有缓存、缓存关闭或不可用时返回 None"""
+    if not _cache_enabled():
+        return None
+    cache_dir = _cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        return _read_cache(os.path.join(cache_dir, _cache_key(path, kwargs, cache_dir)))
+    except Exception:
+        return None
+
+
+def read_excel_many(jobs, workers=None):
+    """
+    同时读取多个表格，返回与 jobs 顺序一致的 DataFrame 列表；jobs 中每项为路径，或 (路径, read_excel 参数 dict)。
+    有缓存的直接加载；需要解析的文件分发到进程池并行解析（openpyxl 解析占用 GIL，线程池无法并行），
+    解析结果同样写入缓存。workers 默认取环境变量 FUND_READ_WORKERS，未设置时为待解析文件数（不超过 CPU 核数）；
+    都未指定时待解析文件合计不足 PARALLEL_MIN_BYTES 则逐个读取，显式指定的进程数总是生效（1 为逐个读取）。
+    """
+    jobs = [(job, {}) if isinstance(job, (str, os.PathLike)) else (job[0], dict(job[1])) for job in jobs]
+    results = [_load_cached(path, kwargs) for path, kwargs in jobs]
+    pending = [i for i, df in enumerate(results) if df is None]
+
+    env_workers = int(os.environ.get("FUND_READ_WORKERS", "0"))
+    explicit = workers is not None or env_workers > 0
+    if workers is None:
+        workers = env_workers or min(len(pending), os.cpu_count() or 1)
+    small = not explicit and sum(os.path.getsize(jobs[i][0]) for i in pending) < PARALLEL_MIN_BYTES
+    if workers <= 1 or len(pending) <= 1 or small:
+        for i in pending:
+            results[i] = read_excel_cached(jobs[i][0], **jobs[i][1])
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+        futures = {i: pool.submit(read_excel_cached, jobs[i][0], **jobs[i][1]) for i in pending}
+        for i, future in futures.items():
+            results[i] = future.result()
+    return results
@@ -0,0 +1,149 @@
+"""
+运行记录：按环节（选择文件、读取、清洗、分组汇总、合并、写出、绘图……）记录耗时、输入/输出行数和内存，
+运行结束后写出 JSON 报告；可选用 cProfile 记录整个运行
+
+默认关闭，环节记录几乎没有开销。通过环境变量启用，无需修改代码：
+- FUND_RUN_REPORT=1：在当前目录写出 运行记录_<脚本名>_<时间>.json；也可直接给出 .json 文件路径
+- FUND_PROFILE=运行.prof：同时用 cProfile 记录整个运行，可用 python -m pstats 运行.prof 查看
+
+内存峰值由 tracemalloc 统计（启用运行记录时才开启）；RSS 为进程常驻内存，装有 psutil 时为当前值，
+否则为截至当时的进程峰值（Windows 上无 psutil 时不记录）。
+"""
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_records = None  # 启用运行记录时为环节列表，否则为 None
+_stack = []
+
+
+def _rss_mb():
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 1024 / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class _Stage:
+    """一个环节的记录；rows() 记下输出行数并原样返回数据，便于写成 df = st.rows(...)"""
+    __slots__ = ("name", "level", "seconds", "rows_in", "rows_out", "peak", "rss", "error")
+
+    def __init__(self, name, rows_in=None, level=0):
+        self.name, self.level, self.rows_in = name, level, rows_in
+        self.seconds = self.rows_out = self.rss = self.error = None
+        self.peak = 0
+
+    def rows(self, data):
+        if data is not None and hasattr(data, "__len__"):
+            self.rows_out = len(data)
+        return data
+
+    def to_dict(self):
+        out = {"环节": self.name, "层级": self.level, "耗时(秒)": self.seconds,
+               "输入行数": self.rows_in, "输出行数": self.rows_out,
+               "内存峰值(MB)": round(self.peak / 1024 / 1024, 2), "RSS(MB)": self.rss}
+        if self.error:
+            out["错误"] = self.error
+        return out
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    记录一个环节：with stage("读取-净值") as st: df = st.rows(read_excel_cached(path))
+    rows_in 可传入行数或 DataFrame；环节可以嵌套，外层的内存峰值包含内层。
+    """
+    if rows_in is not None and not isinstance(rows_in, int):
+        rows_in = len(rows_in)
+    st = _Stage(name, rows_in, len(_stack))
+    if _records is None:
+        yield st
+        return
+
+    # 开始内层环节前，把外层到目前为止的峰值先记下，再重置峰值
+    if _stack:
+        _stack[-1].peak = max(_stack[-1].peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    _stack.append(st)
+    _records.append(st)
+    t0 = time.perf_counter()
+    try:
+        yield st
+    except BaseException as e:
+        st.error = repr(e)
+        raise
+    finally:
+        st.seconds = round(time.perf_counter() - t0, 4)
+        _stack.pop()
+        st.peak = max(st.peak, tracemalloc.get_traced_memory()[1])
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, st.peak)
+        st.rss = _rss_mb()
+
+
+def _report_path(setting, script, started):
+    if setting.lower().endswith(".json"):
+        return setting
+    return os.path.join(os.getcwd(), f"运行记录_{script}_{started:%Y%m%d_%H%M%S}.json")
+
+
+def run_main(func, *args, **kwargs):
+    """脚本入口：按环境变量启用运行记录 / cProfile 后运行 func，结束时（含出错）写出报告，返回 func 的返回值"""
+    global _records
+    report = os.environ.get("FUND_RUN_REPORT")
+    if report == "0":
+        report = None
+    profile_path = os.environ.get("FUND_PROFILE")
+    if not report and not profile_path:
+        return func(*args, **kwargs)
+
+    script = os.path.splitext(os.path.basename(sys.argv[0] or func.__name__))[0]
+    started = datetime.datetime.now()
+    profiler = cProfile.Profile() if profile_path else None
+    if report:
+        _records = []
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    status = "成功"
+    try:
+        if profiler is not None:
+            return profiler.runcall(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    except BaseException as e:
+        status = f"失败：{e!r}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(profile_path)
+            print(f"📌 cProfile 结果已保存：{profile_path}")
+        if report:
+            data = {
+                "脚本": script,
+                "参数": sys.argv[1:],
+                "开始时间": started.isoformat(timespec="seconds"),
+                "总耗时(秒)": round(time.perf_counter() - t0, 4),
+                "状态": status,
+                "内存峰值(MB)": round(max([tracemalloc.get_traced_memory()[1]]
+                                          + [st.peak for st in _records]) / 1024 / 1024, 2),
+                "RSS(MB)": _rss_mb(),
+                "环节": [st.to_dict() for st in _records],
+            }
+            tracemalloc.stop()
+            _records = None
+            _stack.clear()
+            path = _report_path(report, script, started)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            print(f"📌 运行记录已保存：{path}")
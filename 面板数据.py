@@ -0,0 +1,66 @@
+"""
+面板数据：多日、多组合长表的紧凑内部表示，只在写出 Excel、绘图时才转成显示用的文本
+
+- 组合代码、组合名称、策略名称等键列用 category：每个不同的值只存一份，各行只存整数编码，
+  groupby / merge 按编码比较，不再逐行比较 Python 字符串；组合代码只对类别补足4位，不必逐行 zfill；
+- 日期统一为 datetime64，计算过程中不再在 datetime.date 对象、"%Y/%m/%d" 文本之间来回转换；
+- 净值、金额等数值列为 float64；对精度不敏感的列可指定为 float32。
+
+to_display 在写出前把 category 还原为文本，并可按需把日期格式化为文本（如表格4的 2025/08/18）。
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+KEY_COLUMNS = ("组合代码", "组合名称", "策略名称")
+DATE_COLUMNS = ("净值日期", "日期", "起始日期")
+
+
+def as_keys(s: pd.Series) -> pd.Series:
+    """键列转为 category（已是 category 时原样返回）"""
+    return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+
+
+def as_codes(s: pd.Series) -> pd.Series:
+    """组合代码转为 category，类别统一为去空格、补足4位的文本（1 / "1" / "0001" 合并为同一类别），缺失值保持缺失"""
+    s = as_keys(s)
+    labels, inverse = np.unique([str(c).strip().zfill(4) for c in s.cat.categories], return_inverse=True)
+    old = s.cat.codes.to_numpy()
+    codes = np.where(old >= 0, inverse[np.clip(old, 0, None)] if len(inverse) else old, -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=s.index, name=s.name)
+
+
+def compact_panel(df: pd.DataFrame, float32=()) -> pd.DataFrame:
+    """键列转 category、日期列转 datetime64，float32 中列出的数值列转为 float32；返回新表"""
+    df = df.copy()
+    for col in KEY_COLUMNS:
+        if col in df.columns:
+            df[col] = as_codes(df[col]) if col == "组合代码" else as_keys(df[col])
+    for col in DATE_COLUMNS:
+        if col in df.columns and not is_datetime64_any_dtype(df[col].dtype):
+            df[col] = pd.to_datetime(df[col])
+    for col in float32:
+        if col in df.columns and is_numeric_dtype(df[col].dtype):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def to_display(df: pd.DataFrame, date_format=None) -> pd.DataFrame:
+    """
+    写出前转成显示用的表：category 列还原为文本；date_format（如 "%Y/%m/%d"）不为空时日期列格式化为文本，
+    否则保持 datetime64，由写出函数按日期单元格写出。
+    """
+    out = df.copy()
+    for col in out.columns:
+        dtype = out[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # 有缺失值时还原为 object，整数类别也不会因缺失值出错
+            out[col] = out[col].astype(object if out[col].isna().any() else dtype.categories.dtype)
+        elif date_format and is_datetime64_any_dtype(dtype):
+            out[col] = out[col].dt.strftime(date_format)
+    return out
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """表格实际占用的内存（含文本对象本身），单位 MB"""
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
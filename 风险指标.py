@@ -0,0 +1,127 @@
+"""
+风险指标：基于完整净值历史计算各组合的年化收益、年化波动率、最大回撤、夏普比率、卡玛比率、
+相对基准的跟踪误差和信息比率，以及近1月 / 近3月 / 今年以来收益
+
+净值长表先转成“日期 × 组合”的矩阵，所有指标在矩阵上用 NumPy 按列一次算出，不逐个组合循环。
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# 年化时每年的净值期数（按交易日）
+PERIODS_PER_YEAR = 252
+
+
+def nav_panel(df, value_cols=("组合净值", "基准净值")):
+    """
+    净值长表 → 以净值日期为索引、（净值列, 组合名称）为列的矩阵。
+    组合中间缺失的日期沿用前一日净值，成立前和停止披露后保持 NaN。
+    """
+    df = df.dropna(subset=["组合名称", "净值日期"]).copy()
+    df["净值日期"] = pd.to_datetime(df["净值日期"])
+    df = df.drop_duplicates(["净值日期", "组合名称"], keep="last")
+    panel = df.pivot(index="净值日期", columns="组合名称", values=list(value_cols)).sort_index()
+    return panel.astype(float).ffill(limit_area="inside")
+
+
+def returns_since(panel, base_dates):
+    """
+    每个日期相对 base_dates 中对应基准日（取当日或之前最近一个净值日）的收益，返回与 panel 同形的矩阵；
+    基准日早于该组合第一条净值时为 NaN。
+    """
+    dates = panel.index
+    base = dates.searchsorted(pd.DatetimeIndex(base_dates), side="right") - 1
+    values = panel.to_numpy()
+    base_values = values[np.clip(base, 0, None)]
+    base_values[base < 0] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame(values / base_values - 1, index=dates, columns=panel.columns)
+
+
+def rolling_returns(panel, months):
+    """滚动 N 个月收益（如 months=1 为近1月），每个日期一行"""
+    return returns_since(panel, panel.index - pd.DateOffset(months=months))
+
+
+def ytd_returns(panel):
+    """今年以来收益：相对上年最后一个净值日"""
+    year_start = panel.index.to_period("Y").to_timestamp()
+    return returns_since(panel, year_start - pd.Timedelta(days=1))
+
+
+def _first_valid(values):
+    """每列第一个非 NaN 值的行号；整列为 NaN 时为 -1"""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=0), np.argmax(valid, axis=0), -1)
+
+
+def _last_valid(values):
+    """每列最后一个非 NaN 值的行号；整列为 NaN 时为 -1"""
+    valid = ~np.isnan(values)
+    last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), last, -1)
+
+
+def _at(values, rows):
+    """按列取指定行的值，行号为 -1 时为 NaN"""
+    out = values[np.clip(rows, 0, None), np.arange(values.shape[1])]
+    return np.where(rows >= 0, out, np.nan)
+
+
+def compute_risk_metrics(df, risk_free=0.0, periods_per_year=PERIODS_PER_YEAR):
+    """
+    由净值长表（组合名称、净值日期、组合净值、基准净值）计算每个组合截至其最新净值日的风险收益指标，
+    返回每个组合一行的 DataFrame。risk_free 为年化无风险利率（如 0.015）。
+    最大回撤以负数表示（如 -0.12 即最大回撤 12%）；近1月 / 近3月 / 今年以来收益在历史不足时为空。
+    """
+    panel = nav_panel(df)
+    nav = panel["组合净值"]
+    names = nav.columns
+    dates = nav.index.to_numpy()
+    p = nav.to_numpy()
+    b = panel["基准净值"].reindex(columns=names).to_numpy()
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # 只有一条净值的组合，各指标为 NaN
+
+        # === 日收益 ===
+        rp = p[1:] / p[:-1] - 1
+        rb = b[1:] / b[:-1] - 1
+        active = rp - rb
+
+        # === 区间首尾与年化收益（复利） ===
+        first = _first_valid(p)
+        last = _last_valid(p)
+        days = (dates[np.clip(last, 0, None)] - dates[np.clip(first, 0, None)]) / np.timedelta64(1, "D")
+        growth = _at(p, last) / _at(p, first)
+        ann_return = np.where(days > 0, growth ** (365.0 / days) - 1, np.nan)
+
+        # === 波动、回撤 ===
+        volatility = np.nanstd(rp, axis=0, ddof=1) * np.sqrt(periods_per_year)
+        drawdown = p / np.fmax.accumulate(p, axis=0) - 1
+        max_drawdown = np.nanmin(drawdown, axis=0)
+
+        sharpe = (np.nanmean(rp, axis=0) * periods_per_year - risk_free) / volatility
+        calmar = ann_return / np.abs(max_drawdown)
+
+        # === 相对基准 ===
+        tracking_error = np.nanstd(active, axis=0, ddof=1) * np.sqrt(periods_per_year)
+        info_ratio = np.nanmean(active, axis=0) * periods_per_year / tracking_error
+
+    result = pd.DataFrame({
+        "组合名称": names,
+        "起始净值日期": pd.to_datetime(np.where(first >= 0, dates[np.clip(first, 0, None)], np.datetime64("NaT"))),
+        "最新净值日期": pd.to_datetime(np.where(last >= 0, dates[np.clip(last, 0, None)], np.datetime64("NaT"))),
+        "年化收益": ann_return,
+        "年化波动率": volatility,
+        "最大回撤": max_drawdown,
+        "夏普比率": sharpe,
+        "卡玛比率": calmar,
+        "跟踪误差": tracking_error,
+        "信息比率": info_ratio,
+        "近1月收益": _at(rolling_returns(nav, 1).to_numpy(), last),
+        "近3月收益": _at(rolling_returns(nav, 3).to_numpy(), last),
+        "今年以来收益": _at(ytd_returns(nav).to_numpy(), last),
+    })
+    return result.replace([np.inf, -np.inf], np.nan)